@@ -1,16 +1,34 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, Dict, List
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional, Dict, List, Tuple
+import asyncio
+import hashlib
+import hmac
 import json
 import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
 
 from services.ocr_service import OCRService
 from services.stt_service import STTService
 from services.ai_interviewer import AIInterviewer
 from services.evaluator import Evaluator
+from services.session_store import SessionStore
+from services.session_backends import SessionConflictError, create_session_backend
+from services.session_journal import SessionJournal
+from services.session_models import InterviewSession, ResponseRecord
+from services.ws_pipeline import InterviewConnection
+from services.metrics import MetricsMiddleware, registry as metrics_registry, run_in_context, timed
+from services.profiler import SamplingProfiler, SlowRequestLog, format_collapsed, summarize_stacks
+from services.openai_client import warm_connections
+from services.readiness import Readiness
+from services.screen_delta import ScreenFrameCache, build_delta, select_fields
+from services.screen_classifier import classify_screen, extract_code_region
 
 # Load environment variables
 load_dotenv()
@@ -29,22 +47,157 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Response-Time"],
 )
 
-# Initialize services
-ocr_service = OCRService()
-stt_service = STTService()
-ai_interviewer = AIInterviewer()
-evaluator = Evaluator()
+# On-demand profiler and slow request capture, served by the admin endpoints
+profiler = SamplingProfiler()
+slow_requests = SlowRequestLog(exclude_prefixes=('/api/admin/',))
 
-# Store active interview sessions
-active_sessions: Dict[str, Dict] = {}
+# Per-route latency histograms, Server-Timing headers and slow request capture
+app.add_middleware(MetricsMiddleware, slow_requests=slow_requests)
+
+# Services are built on first use or by the startup warmup, so importing this
+# module does not load OpenCV, tesseract or the OpenAI client
+@lru_cache(maxsize=None)
+def get_ocr_service() -> OCRService:
+    return OCRService()
+
+@lru_cache(maxsize=None)
+def get_stt_service() -> STTService:
+    return STTService()
+
+@lru_cache(maxsize=None)
+def get_evaluator() -> Evaluator:
+    return Evaluator()
+
+# Warmup progress, reported by the readiness endpoint
+readiness = Readiness()
+warmup_task: Optional[asyncio.Task] = None
+
+def _session_to_state(session: InterviewSession) -> Dict:
+    """Serialize a session for the shared session backend"""
+    return session.to_state()
+
+def _session_from_state(state: Dict) -> InterviewSession:
+    """Rebuild a live session from serialized state"""
+    return InterviewSession.from_state(state, AIInterviewer.from_state(state['interviewer']))
+
+def _create_session_journal() -> Optional[SessionJournal]:
+    """Journal of session events if SESSION_JOURNAL_PATH is set and this is the only worker"""
+    if not os.getenv('SESSION_JOURNAL_PATH'):
+        return None
+    if int(os.getenv('WEB_CONCURRENCY') or 1) > 1:
+        print("Warning: SESSION_JOURNAL_PATH is ignored with more than one worker; "
+              "use SESSION_BACKEND=sqlite or redis to keep sessions across restarts")
+        return None
+    return SessionJournal()
+
+# Write-behind journal of session events, replayed on startup (SESSION_JOURNAL_PATH)
+session_journal = _create_session_journal()
+
+def _journal(event: str, session_id: str, **data):
+    """Record a session event in the journal, if enabled"""
+    if session_journal is not None:
+        session_journal.record(event, session_id, **data)
+
+# Last analyzed screen frame per session, for delta screen analysis responses
+screen_frames = ScreenFrameCache()
+
+def _on_session_removed(session_id: str, reason: str):
+    screen_frames.discard(session_id)
+    _journal('session_ended', session_id, reason=reason)
+
+# Store active interview sessions (idle sessions expire, oldest evicted when full).
+# With SESSION_BACKEND set, sessions are shared between workers through the backend.
+active_sessions = SessionStore(
+    backend=create_session_backend(),
+    serializer=_session_to_state,
+    deserializer=_session_from_state,
+    on_remove=_on_session_removed
+)
+
+# Evaluations currently being computed, keyed by (session_id, history hash)
+pending_evaluations: Dict[Tuple[str, str], asyncio.Future] = {}
+
+# Thread pool for blocking OCR, Whisper and LLM calls
+blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BLOCKING_WORKERS', 16)),
+    thread_name_prefix='blocking'
+)
+
+# Open WebSocket connections, for metrics
+websocket_connections = weakref.WeakSet()
+
+metrics_registry.gauge('interviewer_ready', 'Whether this worker finished its startup warmup', lambda: int(readiness.ready))
+metrics_registry.gauge(
+    'interviewer_time_to_ready_seconds',
+    'Seconds from process start until the warmup finished',
+    lambda: readiness.time_to_ready
+)
+metrics_registry.gauge('interviewer_active_sessions', 'Sessions held by this worker', lambda: len(active_sessions))
+metrics_registry.gauge('interviewer_websocket_connections', 'Open WebSocket connections', lambda: len(websocket_connections))
+metrics_registry.gauge('interviewer_pending_evaluations', 'Evaluations in progress', lambda: len(pending_evaluations))
+metrics_registry.gauge(
+    'interviewer_executor_queue_depth',
+    'Blocking calls waiting for a thread',
+    lambda: blocking_executor._work_queue.qsize()
+)
+metrics_registry.gauge(
+    'interviewer_websocket_pending_messages',
+    'Messages waiting for a WebSocket worker, across connections',
+    lambda: sum(sum(connection.stats()['pending'].values()) for connection in list(websocket_connections))
+)
+metrics_registry.gauge(
+    'interviewer_websocket_send_queue_depth',
+    'Events waiting to be sent, across connections',
+    lambda: sum(connection.send_queue.qsize() for connection in list(websocket_connections))
+)
+
+async def _apply_to_session(session_id: str, change, event: str, **data) -> Optional[InterviewSession]:
+    """
+    Apply a change to a session, journal it and save it
+    
+    The change is reapplied if another worker saved first. It is journaled
+    right after it is applied so a journal compaction never sees one
+    without the other. Returns None if the session does not exist.
+    """
+    session = await active_sessions.fetch(session_id)
+    if session is None:
+        return None
+    change(session)
+    _journal(event, session_id, **data)
+    return await active_sessions.commit(session_id, reapply=change, session=session)
+
+async def _update_session_context(session_id: str, screen_text: str = None,
+                                  speech_text: str = None) -> Optional[InterviewSession]:
+    """Add screen or speech text to a session's interview context, if the session exists"""
+    if not screen_text and not speech_text:
+        # Nothing to add (blank or failed OCR, silent audio): skip the journal and save
+        return await active_sessions.fetch(session_id)
+    return await _apply_to_session(
+        session_id,
+        lambda session: session.interviewer.update_context(
+            screen_text=screen_text, speech_text=speech_text
+        ),
+        'context_updated', screen_text=screen_text, speech_text=speech_text
+    )
 
 # Pydantic models
 class ScreenCaptureRequest(BaseModel):
     session_id: str
     image_base64: str
     timestamp: float
+    # Only return these fields, as dotted paths (e.g. "ocr.text", "ui_elements.count")
+    fields: Optional[List[str]] = None
+    # Return OCR text, blocks and UI elements as changes since the previous frame
+    delta: bool = False
+    # Frame number the client holds; deltas are only computed against it
+    base_frame: Optional[int] = None
+
+class WebSocketScreenCapture(ScreenCaptureRequest):
+    # The original WebSocket protocol sent frames without a timestamp
+    timestamp: Optional[float] = None
 
 class AudioTranscriptionRequest(BaseModel):
     session_id: str
@@ -61,6 +214,389 @@ class ResponseSubmitRequest(BaseModel):
     response_text: str
     screen_context: Optional[str] = None
 
+@app.on_event("startup")
+async def start_background_tasks():
+    global warmup_task
+    
+    if session_journal is not None:
+        # Rebuild interviews that were in progress when the server stopped
+        restored = 0
+        for session_id, state in session_journal.replay().items():
+            if await active_sessions.fetch(session_id) is None:
+                await active_sessions.put(session_id, _session_from_state(state))
+                restored += 1
+        print(f"Restored {restored} session(s) from the journal")
+        
+        session_journal.start(
+            lambda: {
+                session_id: _session_to_state(session)
+                for session_id, session in active_sessions.sessions().items()
+            }
+        )
+        await session_journal.compact()
+    
+    active_sessions.start_sweeper()
+    
+    # Warm up in the background so liveness and readiness can be probed meanwhile
+    if os.getenv('WARMUP', 'true').lower() in ('1', 'true', 'yes'):
+        warmup_task = asyncio.create_task(_warmup())
+    else:
+        readiness.start_warmup()
+        readiness.finish()
+
+async def _warmup():
+    """Build the services, prime the OCR engine and open pooled OpenAI connections"""
+    readiness.start_warmup()
+    
+    def warm_openai() -> Dict:
+        get_stt_service()
+        get_evaluator()
+        return warm_connections()
+    
+    async def step(component: str, func):
+        started = time.perf_counter()
+        try:
+            result = await _run_blocking(func)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        readiness.record(component, result, time.perf_counter() - started)
+    
+    await asyncio.gather(
+        step('ocr', lambda: get_ocr_service().warmup()),
+        step('openai', warm_openai)
+    )
+    readiness.finish()
+    
+    status = readiness.status()
+    failed = [name for name, result in status['components'].items() if not result.get('success')]
+    print(
+        f"Ready in {status['time_to_ready_seconds']:.2f}s after process start "
+        f"(warmup {status['warmup_seconds']:.2f}s)"
+        + (f"; degraded: {', '.join(failed)}" if failed else "")
+    )
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await active_sessions.stop_sweeper()
+    if session_journal is not None:
+        await session_journal.stop()
+
+async def _run_blocking(func, *args):
+    """Run a blocking service call in the thread pool, timed against the current request"""
+    return await asyncio.get_running_loop().run_in_executor(blocking_executor, run_in_context(func, *args))
+
+# Interview operations shared by the HTTP routes and the WebSocket protocol.
+# They raise HTTPException for client-visible errors.
+async def _start_session(session_id: str, student_name: Optional[str] = None,
+                         project_name: Optional[str] = None) -> Dict:
+    """Create a session and generate the opening question"""
+    # Initialize session
+    session = InterviewSession(
+        AIInterviewer(),
+        student_name=student_name,
+        project_name=project_name
+    )
+    await active_sessions.put(session_id, session)
+    
+    _journal('session_started', session_id, state=_session_to_state(session))
+    
+    # Generate first question. The question is added to the session here, on
+    # the event loop, together with its journal event: a compaction can then
+    # never snapshot a change whose event is still to be written
+    question_result = await _run_blocking(session.interviewer.generate_initial_question, False)
+    
+    if not question_result['success']:
+        raise HTTPException(status_code=500, detail=question_result.get('error', 'Failed to generate question'))
+    
+    new_entries = question_result['entries']
+    
+    def apply_question(fresh_session: InterviewSession):
+        fresh_session.interviewer.conversation_history.extend(new_entries)
+        fresh_session.question_count = 1
+    
+    apply_question(session)
+    _journal(
+        'question_asked', session_id,
+        history=[entry.to_dict() for entry in new_entries],
+        question_count=1
+    )
+    await active_sessions.commit(session_id, reapply=apply_question, session=session)
+    
+    return {
+        'success': True,
+        'session_id': session_id,
+        'question': question_result['question'],
+        'question_type': question_result['question_type'],
+        'message': 'Interview started successfully'
+    }
+
+async def _analyze_screen(session_id: str, image_base64: str, timestamp: float = None,
+                          fields: Optional[List[str]] = None, delta: bool = False,
+                          base_frame: Optional[int] = None) -> Dict:
+    """
+    Run OCR and UI detection on a screen capture
+    
+    Every frame is classified as code, slide, terminal or ui (`screen`).
+    For sessions in progress the response carries the frame number and
+    whether the screen text changed. With `delta`, OCR and UI results are
+    returned as changes since the previous frame (`base_frame` in the
+    response; null means a full result was sent instead). With `fields`,
+    only those fields are returned.
+    """
+    # Extract text from screen
+    ocr_result = await _run_blocking(get_ocr_service().extract_text_from_base64, image_base64)
+    
+    # Detect UI elements
+    ui_result = await _run_blocking(get_ocr_service().detect_ui_elements, image_base64)
+    
+    with timed('screen_classify'):
+        screen = classify_screen(ocr_result, ui_result)
+    
+    result = {
+        'success': True,
+        'session_id': session_id,
+        'ocr': ocr_result,
+        'ui_elements': ui_result,
+        'screen': screen,
+        'timestamp': timestamp
+    }
+    
+    # Update interview context if session exists
+    if await _update_session_context(session_id, screen_text=ocr_result.get('text', '')) is not None:
+        code = extract_code_region(ocr_result) if screen['type'] == 'code' else None
+        frame, previous = screen_frames.update(
+            session_id, ocr_result, ui_result, keep_content=delta,
+            screen_type=screen['type'], code=code
+        )
+        result['frame'] = frame.number
+        result['changed'] = previous is None or previous.digest != frame.digest
+        if delta:
+            # A delta needs the previous frame's content and must be against
+            # the frame the client holds; otherwise the full result is sent
+            if (previous is not None and previous.has_content and ocr_result.get('success')
+                    and base_frame in (None, previous.number)):
+                result['ocr'], result['ui_elements'] = build_delta(previous, ocr_result, ui_result)
+                result['base_frame'] = previous.number
+            else:
+                result['base_frame'] = None
+    
+    if fields:
+        result = select_fields(
+            result, fields, always=('success', 'session_id', 'timestamp', 'frame', 'base_frame')
+        )
+    return result
+
+async def _transcribe_audio(session_id: str, audio_base64: str, format: str = "webm") -> Dict:
+    """Transcribe audio with Whisper"""
+    # Transcribe audio
+    transcript_result = await _run_blocking(
+        get_stt_service().transcribe_base64_audio, audio_base64, format
+    )
+    
+    # Update interview context if session exists
+    if transcript_result['success']:
+        await _update_session_context(session_id, speech_text=transcript_result.get('text', ''))
+    
+    return {
+        'success': True,
+        'session_id': session_id,
+        'transcription': transcript_result
+    }
+
+async def _submit_response(session_id: str, response_text: str,
+                           screen_context: Optional[str] = None) -> Dict:
+    """Store a student response and generate the next question"""
+    session = await active_sessions.fetch(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    interviewer = session.interviewer
+    
+    # Store response. Every change is journaled in the same step that
+    # applies it, with no await in between, so a compaction running while
+    # the question is generated cannot snapshot it and replay it twice.
+    response_record = ResponseRecord(
+        response_text,
+        screen_context,
+        session.question_count
+    )
+    session.responses.append(response_record)
+    _journal('response_received', session_id, response=response_record.to_dict())
+    
+    # Generate next question; the first answer given while the screen shows
+    # new code gets the code-review question, with only the code region as
+    # context. Later answers about the same code get regular follow-ups.
+    frame = screen_frames.latest(session_id)
+    if frame is not None and frame.screen_type == 'code' and frame.code and not frame.code_reviewed:
+        next_question = await _run_blocking(
+            interviewer.generate_code_specific_question,
+            frame.code,
+            response_text,
+            False
+        )
+        if next_question['success']:
+            screen_frames.mark_code_reviewed(session_id, frame.code)
+    else:
+        next_question = await _run_blocking(
+            interviewer.generate_followup_question,
+            response_text,
+            screen_context or "",
+            False
+        )
+    
+    if not next_question['success']:
+        await active_sessions.commit(
+            session_id,
+            reapply=lambda fresh_session: fresh_session.responses.append(response_record),
+            session=session
+        )
+        raise HTTPException(status_code=500, detail=next_question.get('error', 'Failed to generate question'))
+    
+    new_entries = next_question['entries']
+    interviewer.conversation_history.extend(new_entries)
+    session.question_count += 1
+    _journal('question_asked', session_id,
+             history=[entry.to_dict() for entry in new_entries],
+             question_count=session.question_count)
+    
+    def apply_response(fresh_session: InterviewSession):
+        fresh_session.responses.append(response_record)
+        fresh_session.interviewer.conversation_history.extend(new_entries)
+        fresh_session.question_count += 1
+    
+    session = await active_sessions.commit(session_id, reapply=apply_response, session=session) or session
+    
+    # Check if we should end the interview
+    max_questions = int(os.getenv('MAX_QUESTIONS', 10))
+    should_end = session.question_count >= max_questions
+    
+    return {
+        'success': True,
+        'question': next_question['question'],
+        'question_type': next_question['question_type'],
+        'question_number': session.question_count,
+        'should_end': should_end,
+        'focus_areas': next_question.get('focus_areas', [])
+    }
+
+def _evaluation_key(conversation_history: List[Dict]) -> str:
+    """Hash of the conversation and rubric an evaluation was computed from"""
+    payload = json.dumps({
+        'conversation_history': conversation_history,
+        'criteria': get_evaluator().evaluation_criteria,
+        'mode': get_evaluator().mode
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+async def _run_evaluation(session_id: str, key: str, conversation_history: List[Dict],
+                          project_context: Dict) -> Dict:
+    """Evaluate off the event loop and cache complete results on the session"""
+    evaluator = get_evaluator()
+    evaluation_result = await _run_blocking(
+        evaluator.evaluate_interview, conversation_history, project_context
+    )
+    
+    if evaluation_result['success']:
+        evaluation_result['report'] = evaluator.generate_final_report(
+            evaluation_result['evaluation']
+        )
+        # Partial fan-out results are returned but retried on the next call
+        if not evaluation_result['evaluation'].get('partial'):
+            cached = {
+                'key': key,
+                'evaluation': evaluation_result['evaluation'],
+                'report': evaluation_result['report']
+            }
+            await _apply_to_session(
+                session_id, lambda session: setattr(session, 'evaluation', cached),
+                'evaluated', evaluation=cached
+            )
+    
+    return evaluation_result
+
+async def _evaluate_session(session_id: str) -> Dict:
+    """Evaluate a session, reusing the stored result if the conversation is unchanged"""
+    session = await active_sessions.fetch(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    interviewer = session.interviewer
+    
+    # Get conversation history
+    conversation_history = interviewer.get_conversation_history()
+    project_context = interviewer.project_context.to_dict()
+    key = _evaluation_key(conversation_history)
+    
+    # Repeat calls for an unchanged conversation return the stored result
+    cached = session.evaluation
+    if cached and cached['key'] == key:
+        return {
+            'success': True,
+            'evaluation': cached['evaluation'],
+            'report': cached['report'],
+            'session_id': session_id,
+            'cached': True
+        }
+    
+    # Concurrent duplicate requests share a single computation
+    pending_key = (session_id, key)
+    task = pending_evaluations.get(pending_key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _run_evaluation(session_id, key, conversation_history, project_context)
+        )
+        pending_evaluations[pending_key] = task
+        task.add_done_callback(lambda _: pending_evaluations.pop(pending_key, None))
+    
+    evaluation_result = await asyncio.shield(task)
+    
+    if not evaluation_result['success']:
+        raise HTTPException(status_code=500, detail=evaluation_result.get('error', 'Evaluation failed'))
+    
+    return {
+        'success': True,
+        'evaluation': evaluation_result['evaluation'],
+        'report': evaluation_result['report'],
+        'session_id': session_id,
+        'cached': False
+    }
+
+async def _session_status(session_id: str) -> Dict:
+    """Current progress of a session"""
+    session = await active_sessions.fetch(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        'success': True,
+        'session_id': session_id,
+        'student_name': session.student_name,
+        'project_name': session.project_name,
+        'question_count': session.question_count,
+        'response_count': len(session.responses)
+    }
+
+async def _handle_errors(operation):
+    """Await an interview operation, mapping failures to HTTP errors"""
+    try:
+        return await operation
+    except HTTPException:
+        raise
+    except SessionConflictError:
+        raise HTTPException(status_code=409, detail="Session was modified concurrently, please retry")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow a request only if it carries the ADMIN_TOKEN in X-Admin-Token"""
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (set ADMIN_TOKEN)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 # Routes
 @app.get("/")
 async def root():
@@ -71,197 +607,130 @@ async def root():
         "version": "1.0.0"
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop is responsive"""
+    return {'status': 'alive', 'uptime': round(time.time() - readiness.process_started, 3)}
+
+@app.get("/health/ready")
+async def readiness_probe():
+    """Readiness probe: 503 until the startup warmup has finished"""
+    return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
+
 @app.post("/api/interview/start")
 async def start_interview(request: InterviewStartRequest):
     """Start a new interview session"""
-    try:
-        session_id = request.session_id
-        
-        # Initialize session
-        active_sessions[session_id] = {
-            'student_name': request.student_name,
-            'project_name': request.project_name,
-            'interviewer': AIInterviewer(),
-            'started_at': None,
-            'question_count': 0,
-            'responses': []
-        }
-        
-        # Generate first question
-        question_result = active_sessions[session_id]['interviewer'].generate_initial_question()
-        
-        if question_result['success']:
-            active_sessions[session_id]['question_count'] = 1
-            return {
-                'success': True,
-                'session_id': session_id,
-                'question': question_result['question'],
-                'question_type': question_result['question_type'],
-                'message': 'Interview started successfully'
-            }
-        else:
-            raise HTTPException(status_code=500, detail=question_result.get('error', 'Failed to generate question'))
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _handle_errors(
+        _start_session(request.session_id, request.student_name, request.project_name)
+    )
 
 @app.post("/api/screen/analyze")
 async def analyze_screen(request: ScreenCaptureRequest):
     """Analyze screen capture using OCR"""
-    try:
-        # Extract text from screen
-        ocr_result = ocr_service.extract_text_from_base64(request.image_base64)
-        
-        # Detect UI elements
-        ui_result = ocr_service.detect_ui_elements(request.image_base64)
-        
-        # Update interview context if session exists
-        if request.session_id in active_sessions:
-            interviewer = active_sessions[request.session_id]['interviewer']
-            interviewer.update_context(screen_text=ocr_result.get('text', ''))
-        
-        return {
-            'success': True,
-            'session_id': request.session_id,
-            'ocr': ocr_result,
-            'ui_elements': ui_result,
-            'timestamp': request.timestamp
-        }
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await _handle_errors(
+        _analyze_screen(
+            request.session_id, request.image_base64, request.timestamp,
+            request.fields, request.delta, request.base_frame
+        )
+    )
+    # The result is plain JSON data; skipping FastAPI's generic encoder
+    # avoids walking every OCR block again before serializing
+    return JSONResponse(result)
 
 @app.post("/api/audio/transcribe")
 async def transcribe_audio(request: AudioTranscriptionRequest):
     """Transcribe audio using Whisper"""
-    try:
-        # Transcribe audio
-        transcript_result = stt_service.transcribe_base64_audio(
-            request.audio_base64,
-            request.format
-        )
-        
-        # Update interview context if session exists
-        if request.session_id in active_sessions:
-            interviewer = active_sessions[request.session_id]['interviewer']
-            if transcript_result['success']:
-                interviewer.update_context(speech_text=transcript_result.get('text', ''))
-        
-        return {
-            'success': True,
-            'session_id': request.session_id,
-            'transcription': transcript_result
-        }
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _handle_errors(
+        _transcribe_audio(request.session_id, request.audio_base64, request.format)
+    )
 
 @app.post("/api/interview/respond")
 async def submit_response(request: ResponseSubmitRequest):
     """Submit student response and get next question"""
-    try:
-        session_id = request.session_id
-        
-        if session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        session = active_sessions[session_id]
-        interviewer = session['interviewer']
-        
-        # Store response
-        session['responses'].append({
-            'response': request.response_text,
-            'screen_context': request.screen_context,
-            'question_number': session['question_count']
-        })
-        
-        # Generate next question
-        next_question = interviewer.generate_followup_question(
-            request.response_text,
-            request.screen_context or ""
-        )
-        
-        if next_question['success']:
-            session['question_count'] += 1
-            
-            # Check if we should end the interview
-            max_questions = int(os.getenv('MAX_QUESTIONS', 10))
-            should_end = session['question_count'] >= max_questions
-            
-            return {
-                'success': True,
-                'question': next_question['question'],
-                'question_type': next_question['question_type'],
-                'question_number': session['question_count'],
-                'should_end': should_end,
-                'focus_areas': next_question.get('focus_areas', [])
-            }
-        else:
-            raise HTTPException(status_code=500, detail=next_question.get('error', 'Failed to generate question'))
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _handle_errors(
+        _submit_response(request.session_id, request.response_text, request.screen_context)
+    )
 
 @app.post("/api/interview/evaluate/{session_id}")
 async def evaluate_interview(session_id: str):
     """Evaluate the completed interview"""
-    try:
-        if session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        session = active_sessions[session_id]
-        interviewer = session['interviewer']
-        
-        # Get conversation history
-        conversation_history = interviewer.get_conversation_history()
-        project_context = interviewer.project_context
-        
-        # Evaluate interview
-        evaluation_result = evaluator.evaluate_interview(
-            conversation_history,
-            project_context
-        )
-        
-        if evaluation_result['success']:
-            # Generate formatted report
-            report_text = evaluator.generate_final_report(
-                evaluation_result['evaluation']
-            )
-            
-            return {
-                'success': True,
-                'evaluation': evaluation_result['evaluation'],
-                'report': report_text,
-                'session_id': session_id
-            }
-        else:
-            raise HTTPException(status_code=500, detail=evaluation_result.get('error', 'Evaluation failed'))
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _handle_errors(_evaluate_session(session_id))
 
 @app.get("/api/interview/status/{session_id}")
 async def get_interview_status(session_id: str):
     """Get current interview status"""
-    if session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
+    return await _session_status(session_id)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/sessions/stats")
+async def get_session_stats():
+    """Session counts and memory usage"""
+    return {
+        'success': True,
+        'stats': await active_sessions.stats()
+    }
+
+@app.post("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def run_profiler(
+    seconds: float = Query(10.0, gt=0, le=300),
+    interval_ms: Optional[float] = Query(None, ge=1),
+    include_idle: bool = False,
+    format: str = Query('collapsed', pattern='^(collapsed|summary)$')
+):
+    """
+    Sample every thread for a time window
     
-    session = active_sessions[session_id]
+    Returns collapsed stacks (one 'frame;frame;frame count' line per stack,
+    ready for flamegraph.pl or speedscope), or with format=summary the
+    samples per service, hottest functions and most common stacks.
+    """
+    try:
+        profiler.start(interval_ms / 1000 if interval_ms else None, include_idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = profiler.stop()
     
+    if format == 'summary':
+        return {
+            'success': True,
+            'duration': round(profile['duration'], 3),
+            **summarize_stacks(profile['stacks'], top=25)
+        }
+    return PlainTextResponse(
+        format_collapsed(profile['stacks']),
+        headers={'x-profile-samples': str(profile['samples'])}
+    )
+
+@app.get("/api/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(
+    limit: int = Query(20, ge=1),
+    route: Optional[str] = None,
+    min_ms: float = 0
+):
+    """Slow requests captured automatically, newest first"""
     return {
         'success': True,
-        'session_id': session_id,
-        'student_name': session.get('student_name'),
-        'project_name': session.get('project_name'),
-        'question_count': session['question_count'],
-        'response_count': len(session['responses'])
+        'threshold_ms': slow_requests.threshold * 1000,
+        'requests': slow_requests.entries(limit, route, min_ms)
     }
 
+@app.delete("/api/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def clear_slow_requests():
+    """Empty the slow request buffer"""
+    slow_requests.clear()
+    return {'success': True}
+
 @app.delete("/api/interview/end/{session_id}")
 async def end_interview(session_id: str):
     """End and cleanup interview session"""
-    if session_id in active_sessions:
-        del active_sessions[session_id]
+    if await active_sessions.end(session_id):
         return {
             'success': True,
             'message': 'Interview session ended'
@@ -269,47 +738,151 @@ async def end_interview(session_id: str):
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
+def _ws_request(model, session_id: str, message: Dict, **renamed: str):
+    """
+    Validate a WebSocket message with the matching HTTP request model
+
+    Args:
+        model: Request model of the equivalent HTTP route
+        session_id: Session of the connection
+        message: Decoded client message
+        renamed: Model fields carried under another key in the message
+            (e.g. image_base64='data')
+
+    Returns:
+        The validated request; invalid messages raise a 422 HTTPException
+    """
+    data = {key: value for key, value in message.items() if key not in renamed.values()}
+    data.update({field: message[key] for field, key in renamed.items() if key in message})
+    # The connection's session always wins over one named in the message
+    data['session_id'] = session_id
+    try:
+        return model(**data)
+    except ValidationError as e:
+        problems = []
+        for error in e.errors():
+            field, *path = error['loc']
+            # Report fields under the key the client actually sent
+            location = '.'.join(str(part) for part in [renamed.get(field, field), *path])
+            problems.append(f"{location}: {error['msg']}")
+        raise HTTPException(status_code=422, detail=f"Invalid {message['type']} message: {'; '.join(problems)}")
+
 # WebSocket endpoint for real-time communication
 @app.websocket("/ws/interview/{session_id}")
 async def websocket_interview(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time interview communication"""
+    """
+    WebSocket endpoint for real-time interview communication
+    
+    Carries the whole interview over one connection. Client messages
+    (start, respond, evaluate, status, screen_capture, audio_chunk, ping,
+    stats) use the same operations as the HTTP routes, and the server pushes
+    question, evaluation, status, screen_analysis and transcription events
+    as each result is ready.
+    """
     await websocket.accept()
     
-    try:
-        while True:
-            # Receive data from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            # Handle different message types
-            if message['type'] == 'screen_capture':
-                result = ocr_service.extract_text_from_base64(message['data'])
-                await websocket.send_json({
-                    'type': 'screen_analysis',
-                    'result': result
-                })
-            
-            elif message['type'] == 'audio_chunk':
-                result = stt_service.transcribe_base64_audio(message['data'])
-                await websocket.send_json({
-                    'type': 'transcription',
-                    'result': result
-                })
-            
-            elif message['type'] == 'ping':
-                await websocket.send_json({'type': 'pong'})
+    connection = InterviewConnection(websocket)
+    websocket_connections.add(connection)
+    
+    async def start(message: Dict) -> Dict:
+        request = _ws_request(InterviewStartRequest, session_id, message)
+        result = await _start_session(session_id, request.student_name, request.project_name)
+        return {'type': 'question', 'question_number': 1, 'should_end': False, **result}
+    
+    async def respond(message: Dict) -> Dict:
+        request = _ws_request(ResponseSubmitRequest, session_id, message)
+        result = await _submit_response(session_id, request.response_text, request.screen_context)
+        return {'type': 'question', **result}
+    
+    async def evaluate(message: Dict) -> Dict:
+        return {'type': 'evaluation', **await _evaluate_session(session_id)}
+    
+    async def status(message: Dict) -> Dict:
+        return {'type': 'status', **await _session_status(session_id)}
     
+    async def screen_capture(message: Dict) -> Dict:
+        request = _ws_request(WebSocketScreenCapture, session_id, message, image_base64='data')
+        result = await _analyze_screen(
+            session_id, request.image_base64, request.timestamp,
+            request.fields, request.delta, request.base_frame
+        )
+        if request.fields or request.delta:
+            return {'type': 'screen_analysis', **result}
+        # The OCR payload stays under 'result', where existing clients expect it
+        result['result'] = result.pop('ocr')
+        return {'type': 'screen_analysis', **result}
+    
+    async def audio_chunk(message: Dict) -> Dict:
+        request = _ws_request(AudioTranscriptionRequest, session_id, message, audio_base64='data')
+        result = await _transcribe_audio(session_id, request.audio_base64, request.format)
+        result['result'] = result.pop('transcription')
+        return {'type': 'transcription', **result}
+    
+    # Interview steps share one lane so they run in the order they were sent
+    for message_type, handler in (('start', start), ('respond', respond),
+                                  ('evaluate', evaluate), ('status', status)):
+        # A step in progress when the client disconnects is finished rather
+        # than cancelled after its response was already stored
+        connection.register(message_type, handler, lane='interview', finish_on_disconnect=True)
+    
+    # Only the newest screen frame is analyzed; frames arriving while OCR is
+    # busy replace each other instead of building up a backlog
+    connection.register('screen_capture', screen_capture, latest_only=True)
+    connection.register('audio_chunk', audio_chunk)
+    
+    try:
+        await connection.run()
     except WebSocketDisconnect:
         print(f"WebSocket disconnected for session: {session_id}")
     except Exception as e:
         print(f"WebSocket error: {str(e)}")
         await websocket.close()
+    finally:
+        websocket_connections.discard(connection)
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host=os.getenv("HOST", "0.0.0.0"),
-        port=int(os.getenv("PORT", 8000)),
-        reload=True
-    )
\ No newline at end of file
+    
+    parser = argparse.ArgumentParser(description="Run the AI Interviewer API")
+    parser.add_argument(
+        "--production", action="store_true", default=os.getenv("APP_ENV") == "production",
+        help="Multi-worker server without auto-reload (default when APP_ENV=production)"
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes (default: WEB_CONCURRENCY)")
+    args = parser.parse_args()
+    
+    workers = args.workers or int(os.getenv("WEB_CONCURRENCY", 0))
+    if args.production and not workers:
+        # One worker per CPU, but only if workers can share sessions
+        workers = (os.cpu_count() or 1) if active_sessions.backend is not None else 1
+    workers = workers or 1
+    
+    # Multiple workers need a shared SESSION_BACKEND (sqlite or redis)
+    if workers > 1 and active_sessions.backend is None:
+        print("Warning: WEB_CONCURRENCY > 1 without SESSION_BACKEND; sessions will not be shared between workers")
+    if workers > 1:
+        # Worker processes inherit this and leave the session journal disabled
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+    
+    if args.production:
+        uvicorn.run(
+            "main:app",
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", 8000)),
+            workers=workers,
+            reload=False,
+            access_log=False,
+            proxy_headers=True,
+            forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+            timeout_keep_alive=int(os.getenv("KEEP_ALIVE_TIMEOUT", 30)),
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", 30))
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", 8000)),
+            reload=workers == 1,
+            workers=workers
+        )
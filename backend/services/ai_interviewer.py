@@ -1,29 +1,33 @@
-import os
-from openai import OpenAI
 from typing import Dict, List
 import json
+import os
+
+from services.metrics import timed
+from services.openai_client import get_openai_client
+from services.session_models import ConversationEntry, EntryType, ProjectContext
 
 class AIInterviewer:
     """AI-powered interviewer that generates context-aware questions"""
     
-    def __init__(self, api_key: str = None):
-        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
-        self.conversation_history = []
-        self.project_context = {
-            'screen_content': [],
-            'speech_transcripts': [],
-            'identified_topics': []
-        }
+    def __init__(self, api_key: str = None, client=None):
+        self.client = client or get_openai_client(api_key)
+        self.conversation_history: List[ConversationEntry] = []
+        self.project_context = ProjectContext()
     
     def update_context(self, screen_text: str = None, speech_text: str = None):
         """Update the project context with new information"""
         if screen_text:
-            self.project_context['screen_content'].append(screen_text)
+            self.project_context.add_screen_text(screen_text)
         if speech_text:
-            self.project_context['speech_transcripts'].append(speech_text)
+            self.project_context.add_speech_text(speech_text)
     
-    def generate_initial_question(self) -> Dict:
-        """Generate the first question to start the interview"""
+    def generate_initial_question(self, record: bool = True) -> Dict:
+        """
+        Generate the first question to start the interview
+        
+        With record=False the question is returned in 'entries' instead of
+        being added to the conversation history, so the caller can add it.
+        """
         prompt = """You are an expert technical interviewer evaluating a student's project presentation.
         
 Generate an opening question that encourages the student to introduce their project.
@@ -40,25 +44,26 @@ Return your response as JSON in this format:
 }"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
+            with timed('llm_initial_question'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
             
             question_data = json.loads(response.choices[0].message.content)
             
-            self.conversation_history.append({
-                'type': 'question',
-                'content': question_data['question']
-            })
+            entries = [ConversationEntry(EntryType.QUESTION, question_data['question'])]
+            if record:
+                self.conversation_history.extend(entries)
             
             return {
                 'success': True,
                 'question': question_data['question'],
                 'question_type': question_data.get('question_type', 'general'),
-                'focus_areas': question_data.get('focus_areas', [])
+                'focus_areas': question_data.get('focus_areas', []),
+                'entries': entries
             }
             
         except Exception as e:
@@ -70,11 +75,18 @@ Return your response as JSON in this format:
                 'focus_areas': []
             }
     
-    def generate_followup_question(self, student_response: str, screen_context: str = "") -> Dict:
-        """Generate a follow-up question based on student's response and screen content"""
+    def generate_followup_question(self, student_response: str, screen_context: str = "",
+                                   record: bool = True) -> Dict:
+        """
+        Generate a follow-up question based on student's response and screen content
+        
+        With record=False the response and question are returned in 'entries'
+        instead of being added to the conversation history.
+        """
         
         # Build context for the AI
         context = self._build_context_summary()
+        screen_content = self._relevant_context(student_response) or screen_context
         
         prompt = f"""You are an expert technical interviewer. Based on the conversation so far and the visual content, generate the next question.
 
@@ -84,8 +96,8 @@ CONVERSATION HISTORY:
 LATEST STUDENT RESPONSE:
 {student_response}
 
-CURRENT SCREEN CONTENT:
-{screen_context}
+RELEVANT SCREEN CONTENT:
+{screen_content}
 
 Generate a follow-up question that:
 1. Probes deeper into technical details mentioned by the student
@@ -102,30 +114,30 @@ Return your response as JSON:
 }}"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.8,
-                response_format={"type": "json_object"}
-            )
+            with timed('llm_followup_question'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.8,
+                    response_format={"type": "json_object"}
+                )
             
             question_data = json.loads(response.choices[0].message.content)
             
-            self.conversation_history.append({
-                'type': 'student_response',
-                'content': student_response
-            })
-            self.conversation_history.append({
-                'type': 'question',
-                'content': question_data['question']
-            })
+            entries = [
+                ConversationEntry(EntryType.STUDENT_RESPONSE, student_response),
+                ConversationEntry(EntryType.QUESTION, question_data['question'])
+            ]
+            if record:
+                self.conversation_history.extend(entries)
             
             return {
                 'success': True,
                 'question': question_data['question'],
                 'question_type': question_data.get('question_type', 'general'),
                 'focus_areas': question_data.get('focus_areas', []),
-                'reasoning': question_data.get('reasoning', '')
+                'reasoning': question_data.get('reasoning', ''),
+                'entries': entries
             }
             
         except Exception as e:
@@ -137,18 +149,29 @@ Return your response as JSON:
                 'focus_areas': []
             }
     
-    def generate_code_specific_question(self, code_snippet: str, student_response: str) -> Dict:
-        """Generate question specifically about visible code"""
+    def generate_code_specific_question(self, code_snippet: str, student_response: str,
+                                        record: bool = True) -> Dict:
+        """
+        Generate question specifically about visible code
+        
+        With record=False the response and question are returned in 'entries'
+        instead of being added to the conversation history.
+        """
+        
+        context = self._build_context_summary()
         
         prompt = f"""You are reviewing code with a student. Based on this code snippet and their explanation, ask a targeted technical question.
 
+CONVERSATION HISTORY:
+{context}
+
 CODE VISIBLE:
 {code_snippet}
 
 STUDENT'S EXPLANATION:
 {student_response}
 
-Ask a specific question about:
+Do not repeat a question already asked in the conversation. Ask a specific question about:
 - The implementation approach
 - Why they chose specific methods/functions
 - Potential edge cases or improvements
@@ -162,20 +185,29 @@ Return JSON:
 }}"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
+            with timed('llm_code_question'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                )
             
             question_data = json.loads(response.choices[0].message.content)
             
+            entries = [
+                ConversationEntry(EntryType.STUDENT_RESPONSE, student_response),
+                ConversationEntry(EntryType.QUESTION, question_data['question'])
+            ]
+            if record:
+                self.conversation_history.extend(entries)
+            
             return {
                 'success': True,
                 'question': question_data['question'],
                 'question_type': 'code_review',
-                'focus_areas': question_data.get('focus_areas', [])
+                'focus_areas': question_data.get('focus_areas', []),
+                'entries': entries
             }
             
         except Exception as e:
@@ -183,25 +215,54 @@ Return JSON:
                 'success': False,
                 'error': str(e),
                 'question': "Can you walk me through this code?",
-                'question_type': 'fallback'
+                'question_type': 'fallback',
+                'focus_areas': []
             }
     
+    def _relevant_context(self, student_response: str) -> str:
+        """
+        Captured screen and speech fragments most relevant to the response
+        
+        Only the top CONTEXT_TOP_K fragments go into the prompt instead of
+        everything captured so far; empty if nothing captured matches.
+        """
+        with timed('context_search'):
+            fragments = self.project_context.relevant_fragments(
+                student_response, int(os.getenv('CONTEXT_TOP_K', 5))
+            )
+        return "\n\n".join(
+            f"[{fragment['source']}]\n{fragment['text']}" for fragment in fragments
+        )
+    
     def _build_context_summary(self) -> str:
         """Build a summary of the conversation for context"""
         summary = []
         for i, exchange in enumerate(self.conversation_history[-6:], 1):  # Last 6 exchanges
-            summary.append(f"{exchange['type'].upper()}: {exchange['content']}")
+            summary.append(f"{exchange.type.value.upper()}: {exchange.content}")
         return "\n".join(summary)
     
     def get_conversation_history(self) -> List[Dict]:
         """Get the full conversation history"""
-        return self.conversation_history
+        return [entry.to_dict() for entry in self.conversation_history]
+    
+    def get_state(self) -> Dict:
+        """Get the interview state as JSON-serializable data"""
+        return {
+            'conversation_history': self.get_conversation_history(),
+            'project_context': self.project_context.to_dict()
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict, api_key: str = None, client=None) -> 'AIInterviewer':
+        """Recreate an interviewer from data returned by get_state"""
+        interviewer = cls(api_key=api_key, client=client)
+        interviewer.conversation_history = [
+            ConversationEntry.from_dict(entry) for entry in state.get('conversation_history', [])
+        ]
+        interviewer.project_context = ProjectContext.from_dict(state.get('project_context', {}))
+        return interviewer
     
     def reset(self):
         """Reset the interview session"""
         self.conversation_history = []
-        self.project_context = {
-            'screen_content': [],
-            'speech_transcripts': [],
-            'identified_topics': []
-        }
\ No newline at end of file
+        self.project_context = ProjectContext()
\ No newline at end of file
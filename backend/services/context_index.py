@@ -0,0 +1,227 @@
+import heapq
+from array import array
+import math
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Screen text is split into fragments of at most this many lines (paragraphs
+# are kept together when they fit), speech into runs of whole sentences of at
+# most this many words
+FRAGMENT_LINES = 8
+FRAGMENT_WORDS = 50
+
+# Fragments kept per session index; the oldest are dropped beyond this so a
+# long interview's index stays bounded
+MAX_FRAGMENTS = int(os.getenv('CONTEXT_INDEX_MAX_FRAGMENTS', 64))
+
+_WORD = re.compile(r'[A-Za-z][A-Za-z0-9]*|[0-9]+')
+_WORD_PART = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|[0-9]+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by can do for from has have i if in into is it its
+me my of on or so that the their then there these this to was we were what
+when which will with you your
+""".split())
+
+
+def _term(word: str) -> str:
+    """Lowercase a word and drop a plural or third-person 's' ("users", "evicts")"""
+    word = word.lower()
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Search terms of a text
+
+    Identifiers also contribute their parts, so "getUserName" and
+    "get_user_name" both match a question about the "user name".
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        lowered = word.lower()
+        if len(lowered) > 1 and lowered not in STOP_WORDS:
+            terms.append(_term(lowered))
+        parts = _WORD_PART.findall(word)
+        if len(parts) > 1:
+            terms.extend(_term(part) for part in parts
+                         if len(part) > 1 and part.lower() not in STOP_WORDS)
+    return terms
+
+
+def screen_fragments(text: str) -> List[str]:
+    """Split captured screen text into paragraphs of at most FRAGMENT_LINES lines"""
+    fragments = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        lines = [line.rstrip() for line in paragraph.splitlines() if line.strip()]
+        for start in range(0, len(lines), FRAGMENT_LINES):
+            fragments.append("\n".join(lines[start:start + FRAGMENT_LINES]))
+    return fragments
+
+
+def speech_fragments(text: str) -> List[str]:
+    """Split a transcript into runs of whole sentences of at most FRAGMENT_WORDS words"""
+    fragments, current, words = [], [], 0
+    for sentence in _SENTENCE_END.split(text.strip()):
+        count = len(sentence.split())
+        if current and words + count > FRAGMENT_WORDS:
+            fragments.append(" ".join(current))
+            current, words = [], 0
+        if count:
+            current.append(sentence)
+            words += count
+    if current:
+        fragments.append(" ".join(current))
+    return fragments
+
+
+class ContextIndex:
+    """
+    Incremental BM25 index over a session's screen and speech fragments
+
+    Fragments are added as captures arrive and are never re-scored as a whole:
+    each keeps its term counts in an inverted index, and a search only visits
+    the postings of the query's terms. A fragment whose exact text was already
+    indexed (the same editor window or slide captured again) is not added a
+    second time, so repeated captures do not crowd out the rest of the
+    session. At most `max_fragments` are kept: adding one more drops the
+    oldest fragment and its postings.
+    """
+
+    __slots__ = ('fragments', 'sources', 'max_fragments', '_lengths', '_total_length', '_postings',
+                 '_seen', '_first_id', '_screen_count', '_speech_count', '_lock')
+
+    def __init__(self, max_fragments: int = None):
+        self.fragments: List[str] = []
+        self.sources: List[str] = []
+        self.max_fragments = max_fragments or MAX_FRAGMENTS
+        self._lengths: List[int] = []
+        self._total_length = 0
+        # Fragment ids keep increasing as old fragments are dropped;
+        # fragments[0] has this id
+        self._first_id = 0
+        # term -> flat array of (fragment id, term count) pairs in id order;
+        # far smaller than a dict per term
+        self._postings: Dict[str, array] = {}
+        self._seen: Dict[str, int] = {}
+        # How many screen captures and transcripts of the context are indexed
+        self._screen_count = 0
+        self._speech_count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.fragments)
+
+    def add(self, text: str, source: str):
+        """Index one fragment unless identical text is already indexed"""
+        if not text or text in self._seen:
+            return
+        terms = tokenize(text)
+        if not terms:
+            return
+
+        if len(self.fragments) >= self.max_fragments:
+            self._drop_oldest()
+
+        fragment_id = self._first_id + len(self.fragments)
+        self._seen[text] = fragment_id
+        self.fragments.append(text)
+        self.sources.append(source)
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array('L')
+            postings.extend((fragment_id, count))
+
+    def _drop_oldest(self):
+        text = self.fragments.pop(0)
+        self.sources.pop(0)
+        self._total_length -= self._lengths.pop(0)
+        fragment_id = self._first_id
+        self._first_id += 1
+        del self._seen[text]
+        for term in set(tokenize(text)):
+            # The oldest fragment always comes first in its terms' postings
+            postings = self._postings[term]
+            del postings[:2]
+            if not postings:
+                del self._postings[term]
+
+    def sync(self, screen_content: List[str], speech_transcripts: List[str]):
+        """Index captures and transcripts added to the context since the last sync"""
+        # Captures may be appended on the event loop while this indexes on a
+        # worker thread, so the counts only advance past what was sliced here
+        with self._lock:
+            new_screens = screen_content[self._screen_count:]
+            for text in new_screens:
+                for fragment in screen_fragments(text):
+                    self.add(fragment, 'screen')
+            self._screen_count += len(new_screens)
+
+            new_speech = speech_transcripts[self._speech_count:]
+            for text in new_speech:
+                for fragment in speech_fragments(text):
+                    self.add(fragment, 'speech')
+            self._speech_count += len(new_speech)
+
+    def search(self, query: str, top_k: int = 5, sources: Iterable[str] = None) -> List[Dict]:
+        """
+        The fragments most relevant to a query, best first
+
+        Args:
+            query: Text to match, such as the student's latest answer
+            top_k: Maximum number of fragments to return
+            sources: Only return fragments from these sources ('screen', 'speech')
+
+        Returns:
+            List of {'text', 'source', 'score'} dictionaries; fragments sharing
+            no terms with the query are never returned
+        """
+        with self._lock:
+            count = len(self.fragments)
+            if not count or top_k <= 0:
+                return []
+            average_length = self._total_length / count
+            allowed = set(sources) if sources is not None else None
+
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                matches = len(postings) // 2
+                idf = math.log(1 + (count - matches + 0.5) / (matches + 0.5))
+                for fragment_id, frequency in zip(postings[::2], postings[1::2]):
+                    length = self._lengths[fragment_id - self._first_id]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[fragment_id] = scores.get(fragment_id, 0.0) + \
+                        idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+            # Equal scores favour the more recent fragment
+            ranked: List[Tuple[int, float]] = heapq.nlargest(
+                top_k,
+                ((fragment_id, score) for fragment_id, score in scores.items()
+                 if allowed is None or self.sources[fragment_id - self._first_id] in allowed),
+                key=lambda item: (item[1], item[0])
+            )
+            return [
+                {'text': self.fragments[fragment_id - self._first_id],
+                 'source': self.sources[fragment_id - self._first_id],
+                 'score': round(score, 3)}
+                for fragment_id, score in ranked
+            ]
@@ -1,28 +1,48 @@
 import os
-from openai import OpenAI
 from typing import Dict, List
 import json
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from services.metrics import run_in_context, timed
+from services.openai_client import get_openai_client
+
+# JSON shape of one criterion's score in the evaluation prompts
+CRITERION_SCORE_TEMPLATE = """{
+            "score": 0-100,
+            "feedback": "specific feedback",
+            "strengths": ["strength 1", "strength 2"],
+            "weaknesses": ["weakness 1", "weakness 2"]
+        }"""
 
 class Evaluator:
     """Service for evaluating student performance and generating feedback"""
     
-    def __init__(self, api_key: str = None):
-        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+    def __init__(self, api_key: str = None, mode: str = None, client=None):
+        self.client = client or get_openai_client(api_key)
+        self._usage_lock = threading.Lock()
+        # 'single' asks one call for the whole evaluation, 'fanout' scores
+        # each criterion in its own concurrent call
+        self.mode = mode or os.getenv('EVALUATION_MODE', 'single')
         self.evaluation_criteria = {
             'technical_depth': {
+                'title': 'Technical Depth',
                 'weight': 0.30,
                 'description': 'Understanding of technical concepts and implementation details'
             },
             'clarity': {
+                'title': 'Clarity of Explanation',
                 'weight': 0.25,
                 'description': 'Ability to explain concepts clearly and coherently'
             },
             'originality': {
+                'title': 'Originality',
                 'weight': 0.20,
                 'description': 'Innovation and creative problem-solving'
             },
             'implementation_understanding': {
+                'title': 'Implementation Understanding',
                 'weight': 0.25,
                 'description': 'Deep understanding of how the project is implemented'
             }
@@ -41,16 +61,24 @@ class Evaluator:
             Complete evaluation with scores and detailed feedback
         """
         
+        if self.mode == 'fanout':
+            return self.evaluate_interview_parallel(conversation_history, project_context)
+        
         # Prepare conversation for analysis
         conversation_text = self._format_conversation(conversation_history)
+        total_weight = sum(criterion['weight'] for criterion in self.evaluation_criteria.values()) or 1
+        criteria_text = "\n".join(
+            f"{i}. {criterion['title']} ({criterion['weight'] / total_weight:.0%}): {criterion['description']}"
+            for i, criterion in enumerate(self.evaluation_criteria.values(), 1)
+        )
+        scores_template = ",\n".join(
+            f'        "{name}": ' + CRITERION_SCORE_TEMPLATE for name in self.evaluation_criteria
+        )
         
         prompt = f"""You are an expert technical evaluator assessing a student's project presentation and interview.
 
 EVALUATION CRITERIA:
-1. Technical Depth (30%): Understanding of technical concepts, architecture, algorithms
-2. Clarity of Explanation (25%): Ability to communicate ideas clearly and logically
-3. Originality (20%): Innovation, creativity, unique approaches
-4. Implementation Understanding (25%): Deep knowledge of how code works, design decisions
+{criteria_text}
 
 INTERVIEW TRANSCRIPT:
 {conversation_text}
@@ -63,30 +91,7 @@ Provide a comprehensive evaluation in JSON format:
 {{
     "overall_score": 0-100,
     "criteria_scores": {{
-        "technical_depth": {{
-            "score": 0-100,
-            "feedback": "specific feedback",
-            "strengths": ["strength 1", "strength 2"],
-            "weaknesses": ["weakness 1", "weakness 2"]
-        }},
-        "clarity": {{
-            "score": 0-100,
-            "feedback": "specific feedback",
-            "strengths": [],
-            "weaknesses": []
-        }},
-        "originality": {{
-            "score": 0-100,
-            "feedback": "specific feedback",
-            "strengths": [],
-            "weaknesses": []
-        }},
-        "implementation_understanding": {{
-            "score": 0-100,
-            "feedback": "specific feedback",
-            "strengths": [],
-            "weaknesses": []
-        }}
+{scores_template}
     }},
     "summary": "2-3 sentence overall assessment",
     "detailed_feedback": "paragraph of detailed feedback",
@@ -96,15 +101,21 @@ Provide a comprehensive evaluation in JSON format:
 
 Be specific, constructive, and fair in your evaluation."""
 
+        usage = self._empty_usage()
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,  # Lower temperature for consistent evaluation
-                response_format={"type": "json_object"}
-            )
+            # Lower temperature for consistent evaluation
+            evaluation = self._request_json(prompt, temperature=0.3, usage=usage,
+                                            stage='llm_evaluation')
             
-            evaluation = json.loads(response.choices[0].message.content)
+            # The overall score follows the configured weights rather than
+            # the model's own arithmetic
+            scored = {
+                name: data for name, data in evaluation.get('criteria_scores', {}).items()
+                if name in self.evaluation_criteria and isinstance(data, dict)
+                and isinstance(data.get('score'), (int, float))
+            }
+            if scored:
+                evaluation['overall_score'] = self._calculate_weighted_score(scored)
             
             # Add metadata
             evaluation['timestamp'] = datetime.now().isoformat()
@@ -113,16 +124,196 @@ Be specific, constructive, and fair in your evaluation."""
             
             return {
                 'success': True,
-                'evaluation': evaluation
+                'evaluation': evaluation,
+                'usage': usage
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e),
-                'evaluation': self._generate_fallback_evaluation()
+                'evaluation': self._generate_fallback_evaluation(),
+                'usage': usage
             }
     
+    def evaluate_interview_parallel(self, conversation_history: List[Dict],
+                                    project_context: Dict) -> Dict:
+        """
+        Evaluate the interview with one concurrent call per criterion
+        
+        Each criterion gets a small focused prompt, the narrative sections are
+        generated alongside them, and the overall score is computed locally
+        from the configured weights. If some criteria fail the evaluation is
+        still returned, marked as partial.
+        
+        Args:
+            conversation_history: List of all questions and responses
+            project_context: Context about the project (screens, transcripts)
+            
+        Returns:
+            Complete evaluation with scores and detailed feedback
+        """
+        
+        conversation_text = self._format_conversation(conversation_history)
+        usage = self._empty_usage()
+        
+        with ThreadPoolExecutor(max_workers=len(self.evaluation_criteria) + 1) as executor:
+            criterion_futures = {
+                name: executor.submit(run_in_context(
+                    self._evaluate_criterion, name, conversation_text, project_context, usage
+                ))
+                for name in self.evaluation_criteria
+            }
+            narrative_future = executor.submit(run_in_context(
+                self._generate_narrative, conversation_text, project_context, usage
+            ))
+            
+            criteria_scores = {}
+            errors = {}
+            for name, future in criterion_futures.items():
+                try:
+                    criteria_scores[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+            
+            try:
+                narrative = narrative_future.result()
+            except Exception as e:
+                errors['narrative'] = str(e)
+                narrative = {}
+        
+        if not criteria_scores:
+            return {
+                'success': False,
+                'error': '; '.join(f"{name}: {error}" for name, error in errors.items()),
+                'evaluation': self._generate_fallback_evaluation(),
+                'usage': usage
+            }
+        
+        overall_score = self._calculate_weighted_score(criteria_scores)
+        evaluation = {
+            'overall_score': overall_score,
+            'criteria_scores': criteria_scores,
+            'summary': narrative.get('summary', 'Summary could not be generated.'),
+            'detailed_feedback': narrative.get('detailed_feedback', 'Detailed feedback could not be generated.'),
+            'recommendations': narrative.get('recommendations', []),
+            'notable_moments': narrative.get('notable_moments', []),
+            'timestamp': datetime.now().isoformat(),
+            'interview_length': len(conversation_history),
+            'grade': self._calculate_grade(overall_score)
+        }
+        
+        failed_criteria = [name for name in self.evaluation_criteria if name not in criteria_scores]
+        if errors:
+            evaluation['partial'] = True
+            evaluation['failed_criteria'] = failed_criteria
+        
+        return {
+            'success': True,
+            'evaluation': evaluation,
+            'errors': errors,
+            'usage': usage
+        }
+    
+    def _evaluate_criterion(self, criterion_name: str, conversation_text: str,
+                            project_context: Dict, usage: Dict = None) -> Dict:
+        """Score a single criterion with a focused prompt"""
+        criterion = self.evaluation_criteria[criterion_name]
+        title = criterion['title']
+        
+        prompt = f"""You are an expert technical evaluator assessing a student's project presentation and interview.
+
+Evaluate ONLY this criterion:
+{title}: {criterion['description']}
+
+INTERVIEW TRANSCRIPT:
+{conversation_text}
+
+PROJECT CONTEXT:
+- Screen content analyzed: {len(project_context.get('screen_content', []))} captures
+- Speech segments: {len(project_context.get('speech_transcripts', []))} segments
+
+Return your assessment as JSON:
+{{
+    "score": 0-100,
+    "feedback": "specific feedback",
+    "strengths": ["strength 1", "strength 2"],
+    "weaknesses": ["weakness 1", "weakness 2"]
+}}"""
+        
+        result = self._request_json(prompt, temperature=0.3, usage=usage,
+                                    stage='llm_evaluation_criterion')
+        score = min(max(float(result['score']), 0), 100)
+        
+        return {
+            'score': int(score) if score.is_integer() else score,
+            'feedback': result.get('feedback', ''),
+            'strengths': result.get('strengths', []),
+            'weaknesses': result.get('weaknesses', [])
+        }
+    
+    def _generate_narrative(self, conversation_text: str, project_context: Dict,
+                            usage: Dict = None) -> Dict:
+        """Generate the summary, feedback and recommendations sections"""
+        prompt = f"""You are an expert technical evaluator assessing a student's project presentation and interview.
+
+INTERVIEW TRANSCRIPT:
+{conversation_text}
+
+PROJECT CONTEXT:
+- Screen content analyzed: {len(project_context.get('screen_content', []))} captures
+- Speech segments: {len(project_context.get('speech_transcripts', []))} segments
+
+Write the narrative part of the evaluation as JSON:
+{{
+    "summary": "2-3 sentence overall assessment",
+    "detailed_feedback": "paragraph of detailed feedback",
+    "recommendations": ["recommendation 1", "recommendation 2", "recommendation 3"],
+    "notable_moments": ["positive moment 1", "area for improvement 1"]
+}}
+
+Be specific, constructive, and fair."""
+        
+        return self._request_json(prompt, temperature=0.3, usage=usage,
+                                  stage='llm_evaluation_narrative')
+    
+    def _request_json(self, prompt: str, temperature: float, usage: Dict = None,
+                      stage: str = 'llm_evaluation') -> Dict:
+        """Send a single prompt and parse the JSON reply, adding token counts to usage"""
+        with timed(stage):
+            response = self.client.chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                response_format={"type": "json_object"}
+            )
+        
+        if usage is not None:
+            with self._usage_lock:
+                usage['calls'] += 1
+                if getattr(response, 'usage', None):
+                    usage['prompt_tokens'] += response.usage.prompt_tokens
+                    usage['completion_tokens'] += response.usage.completion_tokens
+        
+        return json.loads(response.choices[0].message.content)
+    
+    def _empty_usage(self) -> Dict:
+        """Token counters for one evaluation"""
+        return {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+    
+    def _calculate_weighted_score(self, criteria_scores: Dict) -> float:
+        """Combine criterion scores using the configured weights"""
+        total_weight = sum(
+            self.evaluation_criteria[name]['weight'] for name in criteria_scores
+        )
+        if not total_weight:
+            return 0
+        weighted = sum(
+            data['score'] * self.evaluation_criteria[name]['weight']
+            for name, data in criteria_scores.items()
+        )
+        return round(weighted / total_weight)
+    
     def evaluate_single_response(self, question: str, response: str, 
                                 screen_context: str = "") -> Dict:
         """
@@ -155,12 +346,13 @@ Provide a quick assessment in JSON:
 }}"""
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
+            with timed('llm_single_response'):
+                response = self.client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    response_format={"type": "json_object"}
+                )
             
             assessment = json.loads(response.choices[0].message.content)
             
@@ -187,7 +379,7 @@ Provide a quick assessment in JSON:
 📊 OVERALL SCORE: {evaluation['overall_score']}/100 (Grade: {evaluation['grade']})
 📅 Date: {evaluation['timestamp'][:10]}
 🎯 Interview Length: {evaluation['interview_length']} exchanges
-
+{self._partial_note(evaluation)}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 📈 DETAILED SCORES
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -196,7 +388,7 @@ Provide a quick assessment in JSON:
         
         criteria = evaluation.get('criteria_scores', {})
         for criterion_name, criterion_data in criteria.items():
-            title = criterion_name.replace('_', ' ').title()
+            title = self._criterion_title(criterion_name)
             score = criterion_data.get('score', 0)
             report += f"\n🔹 {title}: {score}/100\n"
             report += f"   {criterion_data.get('feedback', 'No feedback')}\n"
@@ -243,6 +435,18 @@ Provide a quick assessment in JSON:
         
         return report
     
+    def _criterion_title(self, criterion_name: str) -> str:
+        criterion = self.evaluation_criteria.get(criterion_name)
+        return criterion['title'] if criterion else criterion_name.replace('_', ' ').title()
+    
+    def _partial_note(self, evaluation: Dict) -> str:
+        """Report line warning that the score leaves out criteria that failed"""
+        if not evaluation.get('partial'):
+            return ''
+        failed = ', '.join(self._criterion_title(name) for name in evaluation.get('failed_criteria', []))
+        return (f"⚠️  PARTIAL EVALUATION - failed criteria: {failed or 'unknown'}. "
+                f"The score and grade cover only the criteria that were scored.\n")
+    
     def _format_conversation(self, conversation_history: List[Dict]) -> str:
         """Format conversation history for evaluation"""
         formatted = []
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+
+class FakeOpenAI:
+    """
+    Offline stand-in for the OpenAI client used by the services.
+
+    Implements the subset of the client the services call
+    (chat.completions.create, audio.transcriptions.create, and models.list
+    for the startup warmup) and returns
+    deterministic, well-formed JSON for every prompt shape the services send,
+    so evaluations and interviews can run without network access or cost.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._create_transcription))
+        self.models = SimpleNamespace(list=lambda: SimpleNamespace(data=[]))
+
+    def with_options(self, **kwargs) -> 'FakeOpenAI':
+        return self
+
+    def _create_completion(self, model: str, messages: List[Dict], **kwargs):
+        self._simulate_call()
+
+        prompt = "\n".join(message['content'] for message in messages)
+        content = json.dumps(fake_completion_payload(prompt))
+
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                finish_reason='stop',
+                message=SimpleNamespace(role='assistant', content=content)
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(content),
+                total_tokens=estimate_tokens(prompt) + estimate_tokens(content)
+            )
+        )
+
+    def _create_transcription(self, model: str, file, **kwargs):
+        self._simulate_call()
+
+        audio = file.read() if hasattr(file, 'read') else bytes(file)
+        return SimpleNamespace(**fake_transcription_payload(audio))
+
+    def _simulate_call(self):
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("Simulated LLM failure")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _stable_score(seed: str, low: int = 55, high: int = 95) -> int:
+    """Deterministic pseudo-random score for a piece of text"""
+    digest = hashlib.sha256(seed.encode('utf-8')).digest()
+    return low + digest[0] % (high - low + 1)
+
+
+def fake_completion_payload(prompt: str) -> Dict:
+    """Build a response matching the JSON shape the prompt asks for"""
+    if 'Evaluate ONLY this criterion' in prompt:
+        criterion = prompt.split('Evaluate ONLY this criterion:', 1)[1].strip().split(':', 1)[0]
+        return {
+            'score': _stable_score(prompt),
+            'feedback': f"Reasonable {criterion.lower()} shown throughout the interview.",
+            'strengths': [f"Good {criterion.lower()}"],
+            'weaknesses': [f"Could go deeper on {criterion.lower()}"]
+        }
+
+    if 'Write the narrative part' in prompt:
+        return {
+            'summary': "The student presented a working project and answered most questions confidently.",
+            'detailed_feedback': "Explanations were generally clear, with some gaps around design trade-offs.",
+            'recommendations': ["Explain design decisions", "Discuss edge cases", "Add tests"],
+            'notable_moments': ["Clear project overview", "Hesitation on error handling"]
+        }
+
+    if '"overall_score"' in prompt:
+        criteria = ['technical_depth', 'clarity', 'originality', 'implementation_understanding']
+        scores = {
+            name: {
+                'score': _stable_score(name + prompt),
+                'feedback': f"Fake feedback for {name.replace('_', ' ')}.",
+                'strengths': [],
+                'weaknesses': []
+            }
+            for name in criteria
+        }
+        return {
+            'overall_score': round(sum(data['score'] for data in scores.values()) / len(scores)),
+            'criteria_scores': scores,
+            'summary': "The student presented a working project and answered most questions confidently.",
+            'detailed_feedback': "Explanations were generally clear, with some gaps around design trade-offs.",
+            'recommendations': ["Explain design decisions", "Discuss edge cases", "Add tests"],
+            'notable_moments': ["Clear project overview"]
+        }
+
+    if '"quality_score"' in prompt:
+        return {
+            'quality_score': _stable_score(prompt, 4, 9),
+            'strengths': ["Addressed the question"],
+            'gaps': ["Few concrete details"],
+            'technical_accuracy': 'partially accurate',
+            'clarity_rating': 'somewhat clear'
+        }
+
+    if '"code_review"' in prompt:
+        return {
+            'question': "Why did you structure this function this way, and what edge cases does it miss?",
+            'question_type': 'code_review',
+            'focus_areas': ["implementation", "edge cases"]
+        }
+
+    if '"introduction"' in prompt:
+        return {
+            'question': "Could you introduce your project and the problem it solves?",
+            'question_type': 'introduction',
+            'focus_areas': ["overview", "motivation"]
+        }
+
+    number = _stable_score(prompt, 1, 1000)
+    return {
+        'question': f"Can you explain how that part of your implementation works? (#{number})",
+        'question_type': 'technical',
+        'focus_areas': ["implementation"],
+        'reasoning': "Fake follow-up question"
+    }
+
+
+def fake_transcription_payload(audio: bytes) -> Dict:
+    """Build a verbose_json style transcription for some audio bytes"""
+    return {
+        'text': f"This is a simulated answer about my project ({len(audio)} bytes of audio).",
+        'language': 'en',
+        'duration': round(len(audio) / 16000, 2)
+    }
@@ -0,0 +1,229 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Seconds; covers fast decode steps up to slow GPT-4 evaluations
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage timings of the request being handled, shared with the threads it
+# runs blocking work on (see run_in_context)
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = \
+    contextvars.ContextVar('request_timings', default=None)
+
+# Threads currently running blocking work for the request, so slow requests
+# can be sampled where their time is actually spent
+_request_threads: contextvars.ContextVar[Optional[Set[int]]] = \
+    contextvars.ContextVar('request_threads', default=None)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, safe to observe from any thread"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-compatible metrics registry
+
+    Histograms are keyed by a tuple of label values; gauges are callbacks
+    evaluated when the metrics are rendered, so keeping them current costs
+    nothing on the request path.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict] = {}
+        self._gauges: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self._histograms[name] = {'help': help, 'labels': labels, 'series': {}}
+
+    def observe(self, name: str, value: float, *label_values: str):
+        series = self._histograms[name]['series']
+        histogram = series.get(label_values)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(label_values, Histogram())
+        histogram.observe(value)
+
+    def gauge(self, name: str, help: str, callback: Callable[[], float]):
+        self._gauges[name] = {'help': help, 'callback': callback}
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in self._histograms.items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} histogram")
+            for label_values, histogram in list(metric['series'].items()):
+                labels = [f'{label}="{value}"' for label, value in zip(metric['labels'], label_values)]
+                with histogram._lock:
+                    counts = list(histogram.counts)
+                    total, count = histogram.sum, histogram.count
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    bucket_labels = ','.join(labels + ['le="%s"' % le])
+                    lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+                suffix = f"{{{','.join(labels)}}}" if labels else ''
+                lines.append(f"{name}_sum{suffix} {total}")
+                lines.append(f"{name}_count{suffix} {count}")
+
+        for name, metric in self._gauges.items():
+            try:
+                value = metric['callback']()
+            except Exception:
+                continue
+            if value is None:
+                # Not known yet (e.g. time to ready before the warmup finished)
+                continue
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+registry.histogram(
+    'interviewer_stage_duration_seconds',
+    'Duration of processing stages (decode, OCR, Whisper, LLM calls)',
+    labels=('stage',)
+)
+registry.histogram(
+    'interviewer_request_duration_seconds',
+    'End-to-end HTTP request duration',
+    labels=('method', 'route', 'status')
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration globally and against the current request"""
+    registry.observe('interviewer_stage_duration_seconds', seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    """Time the enclosed block as a processing stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def run_in_context(func: Callable, *args, **kwargs) -> Callable[[], object]:
+    """Bind func to a copy of the current context so a worker thread records
+    its stage timings against the request that started it"""
+    context = contextvars.copy_context()
+    return lambda: context.run(_run_tracked, func, args, kwargs)
+
+
+def _run_tracked(func: Callable, args, kwargs):
+    threads = _request_threads.get()
+    if threads is None:
+        return func(*args, **kwargs)
+    ident = threading.get_ident()
+    threads.add(ident)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        threads.discard(ident)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request
+
+    Records end-to-end duration per route and adds `Server-Timing` (per-stage
+    breakdown) and `X-Response-Time` headers to the response. With
+    `slow_requests` (a SlowRequestLog) set, requests over its threshold are
+    captured with their stage timings and sampled stacks.
+    """
+
+    def __init__(self, app, slow_requests=None):
+        self.app = app
+        self.slow_requests = slow_requests
+        self._route_paths: Dict[Callable, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: List[Tuple[str, float]] = []
+        threads: Set[int] = set()
+        token = _request_timings.set(timings)
+        threads_token = _request_threads.set(threads)
+        status = ['500']
+        trace = None
+        if self.slow_requests is not None:
+            trace = self.slow_requests.begin(scope['method'], scope['path'], timings, threads)
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', _server_timing(timings, time.perf_counter() - started).encode()))
+                headers.append((b'x-response-time', f"{(time.perf_counter() - started) * 1000:.1f}ms".encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            _request_threads.reset(threads_token)
+            duration = time.perf_counter() - started
+            route = self._route_path(scope)
+            registry.observe('interviewer_request_duration_seconds', duration, scope['method'], route, status[0])
+            if trace is not None:
+                self.slow_requests.finish(trace, route, status[0], duration)
+
+    def _route_path(self, scope) -> str:
+        """Route template (e.g. /api/interview/status/{session_id}) to keep label cardinality low"""
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            app = scope.get('app')
+            for route in getattr(app, 'routes', []):
+                if getattr(route, 'endpoint', None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = endpoint.__name__
+            self._route_paths[endpoint] = path
+        return path
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    totals: Dict[str, float] = {}
+    for stage, seconds in list(timings):
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
@@ -0,0 +1,62 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_openai_client(api_key: str = None):
+    """
+    Process-wide OpenAI client, created on first use
+
+    The openai package is only imported here, when a client is first needed,
+    and every service shares the one client so they share its pool of
+    keep-alive HTTPS connections instead of each opening their own. An
+    explicit api_key other than OPENAI_API_KEY gets a client of its own.
+    """
+    global _client
+    if api_key and api_key != os.getenv('OPENAI_API_KEY'):
+        from openai import OpenAI
+        return OpenAI(api_key=api_key)
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return _client
+
+
+def warm_connections(count: int = None, timeout: float = 10.0) -> Dict:
+    """
+    Open `count` pooled connections to the API ahead of the first request
+
+    Each connection is opened by a concurrent models.list() call, which costs
+    no tokens; DNS, TCP and TLS setup then happen here instead of on the first
+    interview request. Any HTTP response counts as a warm connection.
+
+    Returns:
+        Dictionary with the number of connections opened and any error
+    """
+    from openai import APIConnectionError, APIStatusError
+
+    count = count if count is not None else int(os.getenv('WARMUP_CONNECTIONS', 2))
+    client = get_openai_client().with_options(max_retries=0, timeout=timeout)
+
+    def open_connection():
+        try:
+            client.models.list()
+        except APIStatusError:
+            pass
+
+    if count <= 0:
+        return {'success': True, 'connections': 0}
+    try:
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            for future in [executor.submit(open_connection) for _ in range(count)]:
+                future.result()
+        return {'success': True, 'connections': count}
+    except APIConnectionError as e:
+        return {'success': False, 'connections': 0, 'error': str(e)}
@@ -0,0 +1,268 @@
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Innermost frames of a thread that is waiting rather than working
+IDLE_FRAMES = {
+    'threading.py:wait',
+    'threading.py:_wait_for_tstate_lock',
+    'selectors.py:select',
+    'thread.py:_worker',
+    'queue.py:get',
+    'socketserver.py:serve_forever',
+}
+
+# Threads of this module, never included in samples
+PROFILER_THREADS = {'profiler', 'slow-request-watchdog'}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    parts = code.co_filename.replace('\\', '/').rsplit('/', 2)
+    return f"{'/'.join(parts[-2:])}:{code.co_name}"
+
+
+def collapse_stack(frame) -> Tuple[str, ...]:
+    """Stack of a frame as labels ordered from the outermost call to the innermost"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def _is_idle(stack: Tuple[str, ...]) -> bool:
+    return bool(stack) and stack[-1].split('/')[-1] in IDLE_FRAMES
+
+
+def _thread_names() -> Dict[int, str]:
+    # Pool threads (blocking_0, blocking_1, ...) are merged into one root frame
+    return {thread.ident: re.sub(r'_\d+$', '', thread.name) for thread in threading.enumerate()}
+
+
+def sample_stacks(thread_ids: Iterable[int] = None, include_idle: bool = False) -> List[Tuple[str, ...]]:
+    """Current stack of each thread (or of the given threads), rooted at the thread name"""
+    frames = sys._current_frames()
+    names = _thread_names()
+    stacks = []
+    for ident in (frames if thread_ids is None else thread_ids):
+        frame = frames.get(ident)
+        if frame is None or names.get(ident) in PROFILER_THREADS:
+            continue
+        stack = collapse_stack(frame)
+        if include_idle or not _is_idle(stack):
+            stacks.append((names.get(ident, str(ident)),) + stack)
+    return stacks
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Collapsed stack format ('frame;frame;frame count' per line), as read by
+    flamegraph.pl, speedscope and most other flamegraph tools"""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+
+
+def summarize_stacks(stacks: Counter, top: int = 10) -> Dict:
+    """Most common stacks, hottest innermost functions and samples per service"""
+    hot_functions: Counter = Counter()
+    services: Counter = Counter()
+    for stack, count in stacks.items():
+        hot_functions[stack[-1]] += count
+        # Attribute the sample to the outermost service on the stack, i.e. the
+        # one the route called (evaluator rather than the HTTP client under it)
+        for label in stack:
+            if label.startswith('services/') and not label.startswith(('services/metrics.py', 'services/profiler.py')):
+                services[label.split('/', 1)[1].split('.py', 1)[0]] += count
+                break
+    return {
+        'samples': sum(stacks.values()),
+        'services': dict(services.most_common()),
+        'hot_functions': [
+            {'function': function, 'count': count}
+            for function, count in hot_functions.most_common(top)
+        ],
+        'top_stacks': [
+            {'stack': ';'.join(stack), 'count': count}
+            for stack, count in stacks.most_common(top)
+        ]
+    }
+
+
+class SamplingProfiler:
+    """
+    On-demand sampling profiler for the whole process
+
+    While running, a background thread snapshots the stack of every thread
+    every `interval` seconds and counts identical stacks. Nothing is
+    instrumented, so the only overhead is the sampling thread itself, and
+    only while a profile is being taken.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or float(os.getenv('PROFILER_INTERVAL_MS', 10)) / 1000
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = None, include_idle: bool = False):
+        """Start sampling; raises RuntimeError if a profile is already running"""
+        with self._lock:
+            if self._thread is not None:
+                raise RuntimeError("A profile is already running")
+            self._stop.clear()
+            self._stacks = Counter()
+            self._samples = 0
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(interval or self.interval, include_idle),
+                name='profiler',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> Dict:
+        """Stop sampling and return the profile"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                raise RuntimeError("No profile is running")
+            self._stop.set()
+            thread.join()
+        return {
+            'duration': time.perf_counter() - self._started,
+            'samples': self._samples,
+            'stacks': self._stacks
+        }
+
+    def _run(self, interval: float, include_idle: bool):
+        while not self._stop.wait(interval):
+            self._samples += 1
+            self._stacks.update(sample_stacks(include_idle=include_idle))
+
+
+class SlowRequestLog:
+    """
+    Automatic capture of slow HTTP requests
+
+    MetricsMiddleware registers every request with `begin` and reports its
+    outcome with `finish`. Once a request has been running for half the
+    threshold, a watchdog thread starts sampling the stacks of the event loop
+    and of the worker threads running blocking calls for it. Requests that
+    end up slower than the threshold are kept, with their stage timings and
+    a summary of the sampled stacks, in a bounded ring buffer.
+    """
+
+    def __init__(self, threshold_ms: float = None, size: int = None, sample_interval_ms: float = None,
+                 exclude_prefixes: Tuple[str, ...] = ()):
+        threshold_ms = threshold_ms if threshold_ms is not None else float(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 2000))
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = (sample_interval_ms or float(os.getenv('SLOW_REQUEST_SAMPLE_MS', 20))) / 1000
+        self.exclude_prefixes = exclude_prefixes
+        self._entries: deque = deque(maxlen=size or int(os.getenv('SLOW_REQUEST_BUFFER', 100)))
+        self._in_flight: Dict[int, Dict] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def begin(self, method: str, path: str, timings: List[Tuple[str, float]], threads: Set[int]) -> Optional[int]:
+        """Start tracking a request; returns a token for `finish` (None if not tracked)"""
+        if not self.enabled or path.startswith(self.exclude_prefixes):
+            return None
+        request_id = next(self._ids)
+        with self._lock:
+            self._in_flight[request_id] = {
+                'method': method,
+                'path': path,
+                'started': time.perf_counter(),
+                'started_at': time.time(),
+                'timings': timings,
+                'threads': threads,
+                'loop_thread': threading.get_ident(),
+                'stacks': Counter()
+            }
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name='slow-request-watchdog', daemon=True)
+                self._watchdog.start()
+        self._busy.set()
+        return request_id
+
+    def finish(self, request_id: Optional[int], route: str, status: str, duration: float):
+        """Stop tracking a request, keeping it if it was slow"""
+        if request_id is None:
+            return
+        with self._lock:
+            request = self._in_flight.pop(request_id, None)
+        if request is None or duration < self.threshold:
+            return
+
+        stages = [{'stage': stage, 'ms': round(seconds * 1000, 1)} for stage, seconds in list(request['timings'])]
+        stage_totals: Dict[str, float] = {}
+        for stage in stages:
+            stage_totals[stage['stage']] = round(stage_totals.get(stage['stage'], 0.0) + stage['ms'], 1)
+        self._entries.append({
+            'id': request_id,
+            'method': request['method'],
+            'path': request['path'],
+            'route': route,
+            'status': int(status),
+            'started_at': request['started_at'],
+            'duration_ms': round(duration * 1000, 1),
+            'stages': stages,
+            'stage_totals': stage_totals,
+            # Time not covered by any stage (event loop, serialization, waiting for a thread)
+            'unaccounted_ms': round(max(0.0, duration * 1000 - sum(stage_totals.values())), 1),
+            'stack_summary': summarize_stacks(request['stacks'])
+        })
+
+    def entries(self, limit: int = None, route: str = None, min_ms: float = 0) -> List[Dict]:
+        """Captured slow requests, newest first"""
+        matching = [
+            entry for entry in reversed(self._entries)
+            if (route is None or entry['route'] == route or entry['path'] == route)
+            and entry['duration_ms'] >= min_ms
+        ]
+        return matching[:limit] if limit else matching
+
+    def clear(self):
+        self._entries.clear()
+
+    def _watch(self):
+        while True:
+            self._busy.wait()
+            time.sleep(self.sample_interval)
+            now = time.perf_counter()
+            with self._lock:
+                if not self._in_flight:
+                    self._busy.clear()
+                    continue
+                watched = [
+                    (request_id, request) for request_id, request in self._in_flight.items()
+                    if now - request['started'] >= self.threshold / 2
+                ]
+            samples = [
+                (request_id, request, sample_stacks({request['loop_thread'], *list(request['threads'])}))
+                for request_id, request in watched
+            ]
+            # Only count samples for requests that have not finished meanwhile
+            with self._lock:
+                for request_id, request, stacks in samples:
+                    if request_id in self._in_flight:
+                        request['stacks'].update(stacks)
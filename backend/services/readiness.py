@@ -0,0 +1,68 @@
+import os
+import time
+from typing import Dict, Optional
+
+_imported_at = time.time()
+
+
+def process_start_time() -> float:
+    """Wall-clock time this process started (from /proc on Linux, else the time of this import)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the command name; starttime (field 22) is in clock ticks since boot
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _imported_at
+
+
+class Readiness:
+    """
+    Startup state of this worker process
+
+    Moves from 'starting' to 'warming' while the warmup runs, then to 'ready',
+    or 'degraded' if a warmup step failed (the worker still serves requests;
+    the failed component will fail or retry on use). Records how long each
+    warmup step took and the time from process start to ready.
+    """
+
+    def __init__(self):
+        self.process_started = process_start_time()
+        self.state = 'starting'
+        self.components: Dict[str, Dict] = {}
+        self.warmup_started: Optional[float] = None
+        self.ready_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ('ready', 'degraded')
+
+    def start_warmup(self):
+        self.state = 'warming'
+        self.warmup_started = time.time()
+
+    def record(self, component: str, result: Dict, seconds: float):
+        """Store the outcome of one warmup step"""
+        self.components[component] = {**result, 'seconds': round(seconds, 3)}
+
+    def finish(self):
+        failed = [name for name, result in self.components.items() if not result.get('success')]
+        self.state = 'degraded' if failed else 'ready'
+        self.ready_at = time.time()
+
+    @property
+    def time_to_ready(self) -> Optional[float]:
+        return self.ready_at - self.process_started if self.ready_at else None
+
+    def status(self) -> Dict:
+        return {
+            'status': self.state,
+            'ready': self.ready,
+            'uptime': round(time.time() - self.process_started, 3),
+            'time_to_ready_seconds': round(self.time_to_ready, 3) if self.ready_at else None,
+            'warmup_seconds': round(self.ready_at - self.warmup_started, 3)
+            if self.ready_at and self.warmup_started else None,
+            'components': self.components
+        }
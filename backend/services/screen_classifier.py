@@ -0,0 +1,201 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+SCREEN_TYPES = ('code', 'slide', 'terminal', 'ui')
+
+# Characters far more common in source code than in prose or slides
+_CODE_SYMBOLS = '{}()[];=<>_#\\|&*+/"$@%!'
+_DROP_CODE_SYMBOLS = str.maketrans('', '', _CODE_SYMBOLS)
+
+_WORD = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+KEYWORDS = frozenset("""
+def class return import from self elif lambda yield async await None True False
+function const let var this new null undefined typeof export require
+public private protected static void int float double bool boolean string char
+struct enum interface extends implements package throws throw catch finally
+try except raise while for if else switch case break continue fn pub impl mut
+""".split())
+
+# Shell prompts (bash/zsh, Python REPL, PowerShell, cmd) and log-style lines
+_TERMINAL_LINE = re.compile(
+    r'\s*(?:\$ |>>> |PS [A-Za-z]:\\|[A-Za-z]:\\[^>]*>|[\w.-]+@[\w.-]+:\S*[$#%]|'
+    r'(?:npm|pip|git|python3?|node|docker|curl|yarn|make|cargo|go|cd|ls|sudo) |'
+    r'Traceback |\[?\d{2}:\d{2}:\d{2}|\d{4}-\d{2}-\d{2}[ T]\d{2}:|'
+    r'(?:INFO|WARN|WARNING|ERROR|DEBUG)\b)'
+)
+_BULLET_LINE = re.compile(r'\s*(?:[•●▪◦‣*-]|\d+[.)]) ')
+
+# A line counts as indented when it starts at least this many characters
+# right of the leftmost line
+MIN_INDENT_CHARS = 2
+
+
+def _group_lines(text_blocks: List[Dict]) -> List[List[Dict]]:
+    """Group OCR word blocks into lines, top to bottom and left to right"""
+    lines: List[List[Dict]] = []
+    line_bottom = None
+    for block in sorted(text_blocks, key=lambda block: (block['position']['y'], block['position']['x'])):
+        position = block['position']
+        # Words whose top is above the current line's bottom belong to it
+        if line_bottom is not None and position['y'] < line_bottom - position['height'] / 2:
+            lines[-1].append(block)
+            line_bottom = max(line_bottom, position['y'] + position['height'])
+        else:
+            lines.append([block])
+            line_bottom = position['y'] + position['height']
+    for line in lines:
+        line.sort(key=lambda block: block['position']['x'])
+    return lines
+
+
+def _char_width(text_blocks: List[Dict]) -> Tuple[float, float]:
+    """Median character width of the words and how uniform it is (1 = monospace)"""
+    widths = sorted(
+        block['position']['width'] / len(block['text'])
+        for block in text_blocks if len(block['text']) >= 3
+    )
+    if not widths:
+        return 0.0, 0.0
+    median = widths[len(widths) // 2]
+    if median <= 0:
+        return 0.0, 0.0
+    # Interquartile spread of per-character widths; proportional fonts
+    # vary far more between words than monospace ones
+    spread = (widths[3 * len(widths) // 4] - widths[len(widths) // 4]) / median
+    return median, max(0.0, 1.0 - spread / 0.3)
+
+
+def _layout_features(text_blocks: List[Dict]) -> Dict:
+    """Indentation and monospace grid alignment from word positions"""
+    lines = _group_lines(text_blocks)
+    char_width, monospace = _char_width(text_blocks)
+    if not lines or not char_width:
+        return {'lines': len(lines), 'indented': 0.0, 'monospace': monospace, 'grid_aligned': 0.0}
+
+    starts = [line[0]['position']['x'] for line in lines]
+    margin = min(starts)
+    offsets = [(start - margin) / char_width for start in starts]
+    indented = [offset for offset in offsets if offset >= MIN_INDENT_CHARS]
+    # Indentation of code falls on whole character columns (usually a
+    # multiple of 2 or 4); centred slide text and UI labels do not
+    aligned = sum(1 for offset in indented if abs(offset - round(offset)) <= 0.25)
+    return {
+        'lines': len(lines),
+        'indented': len(indented) / len(lines),
+        'monospace': monospace,
+        'grid_aligned': aligned / len(indented) if indented else 0.0
+    }
+
+
+def classify_screen(ocr_result: Dict, ui_result: Optional[Dict] = None) -> Dict:
+    """
+    Tag a screen frame as code, slide, terminal or ui from OCR output alone
+
+    Uses symbol density, programming keyword frequency, shell prompt and log
+    lines, bullets and line lengths from the text, indentation and monospace
+    grid alignment from the word positions, and the number of detected UI
+    elements. Runs in well under a millisecond, so every frame can be tagged
+    without an extra model call.
+
+    Args:
+        ocr_result: Result of OCRService.extract_text_from_base64
+        ui_result: Result of OCRService.detect_ui_elements
+
+    Returns:
+        Dictionary with the screen type, a 0-1 confidence and the features used
+    """
+    text = ocr_result.get('text', '') or ''
+    text_lines = [line for line in text.splitlines() if line.strip()]
+    words = _WORD.findall(text)
+    element_count = (ui_result or {}).get('count', 0)
+
+    if not words:
+        return {'type': 'ui', 'confidence': 1.0 if element_count else 0.0, 'features': {}}
+
+    visible = len(text) - text.count(' ') - text.count('\n')
+    symbol_density = (len(text) - len(text.translate(_DROP_CODE_SYMBOLS))) / max(visible, 1)
+    keyword_ratio = sum(1 for word in words if word in KEYWORDS) / len(words)
+    line_count = len(text_lines)
+    terminal_ratio = sum(1 for line in text_lines if _TERMINAL_LINE.match(line)) / line_count
+    bullet_ratio = sum(1 for line in text_lines if _BULLET_LINE.match(line)) / line_count
+    short_ratio = sum(1 for line in text_lines if len(line.split()) <= 2) / line_count
+    words_per_line = len(words) / line_count
+    layout = _layout_features(ocr_result.get('text_blocks') or [])
+    elements_per_line = element_count / line_count
+
+    grid = layout['monospace'] * (0.5 + 0.5 * layout['grid_aligned'])
+    scores = {
+        'code': (2.0 * min(symbol_density / 0.12, 1.0) + 2.0 * min(keyword_ratio / 0.08, 1.0)
+                 + 1.5 * min(layout['indented'] / 0.3, 1.0) + 1.0 * grid),
+        'terminal': 5.0 * min(terminal_ratio / 0.3, 1.0) + 0.5 * grid,
+        'slide': (1.5 * max(0.0, 1.0 - symbol_density / 0.06) + 1.5 * min(bullet_ratio / 0.3, 1.0)
+                  + (1.0 if line_count <= 15 else 0.0) + (1.0 if 2 <= words_per_line <= 12 else 0.0)
+                  + 0.5 * (1.0 - layout['monospace'])),
+        'ui': (2.0 * min(short_ratio / 0.6, 1.0) + 2.0 * min(elements_per_line / 1.5, 1.0)
+               + 0.5 * (1.0 - layout['monospace']))
+    }
+    screen_type = max(SCREEN_TYPES, key=scores.__getitem__)
+    ranked = sorted(scores.values(), reverse=True)
+
+    return {
+        'type': screen_type,
+        # Margin over the runner-up, relative to the winning score
+        'confidence': round((ranked[0] - ranked[1]) / ranked[0], 3) if ranked[0] else 0.0,
+        'features': {
+            'symbol_density': round(symbol_density, 3),
+            'keyword_ratio': round(keyword_ratio, 3),
+            'terminal_ratio': round(terminal_ratio, 3),
+            'bullet_ratio': round(bullet_ratio, 3),
+            'indented': round(layout['indented'], 3),
+            'monospace': round(layout['monospace'], 3),
+            'grid_aligned': round(layout['grid_aligned'], 3),
+            'words_per_line': round(words_per_line, 1),
+            'ui_elements': element_count
+        }
+    }
+
+
+def _is_code_line(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped:
+        return False
+    symbols = len(stripped) - len(stripped.translate(_DROP_CODE_SYMBOLS))
+    return symbols > 0 or any(word in KEYWORDS for word in _WORD.findall(stripped))
+
+
+def extract_code_region(ocr_result: Dict) -> str:
+    """
+    The code on screen, without surrounding menus, tabs and prose
+
+    Takes the longest run of code-like lines (blank lines and single
+    non-code lines inside the run are kept). When word positions are
+    available the lines are rebuilt from them so indentation is restored.
+    """
+    text_blocks = ocr_result.get('text_blocks') or []
+    char_width, _ = _char_width(text_blocks)
+    if text_blocks and char_width:
+        lines = _group_lines(text_blocks)
+        margin = min(line[0]['position']['x'] for line in lines)
+        rendered = [
+            ' ' * round((line[0]['position']['x'] - margin) / char_width)
+            + ' '.join(block['text'] for block in line)
+            for line in lines
+        ]
+    else:
+        rendered = (ocr_result.get('text', '') or '').splitlines()
+
+    best: Tuple[int, int] = (0, 0)
+    start, gap = None, 0
+    for index, line in enumerate(rendered):
+        if _is_code_line(line):
+            if start is None:
+                start = index
+            gap, end = 0, index + 1
+            if end - start > best[1] - best[0]:
+                best = (start, end)
+        elif start is not None and line.strip():
+            gap += 1
+            if gap > 1:
+                start, gap = None, 0
+    return "\n".join(rendered[best[0]:best[1]])
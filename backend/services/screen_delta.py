@@ -0,0 +1,199 @@
+import difflib
+import hashlib
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Block positions are compared on a small grid so OCR jitter of a pixel or
+# two does not turn an unchanged word into a removed and an added block
+POSITION_GRID = 4
+
+
+def _block_key(block: Dict) -> Tuple:
+    position = block.get('position', {})
+    return (block.get('text'),) + tuple(
+        round(position.get(name, 0) / POSITION_GRID)
+        for name in ('x', 'y', 'width', 'height')
+    )
+
+
+def _element_key(element: Dict) -> Tuple:
+    position = element.get('position', {})
+    return (element.get('type'),) + tuple(
+        round(position.get(name, 0) / POSITION_GRID)
+        for name in ('x', 'y', 'width', 'height')
+    )
+
+
+class FrameSnapshot:
+    """What is remembered about a session's last analyzed frame"""
+
+    __slots__ = ('number', 'digest', 'screen_type', 'code', 'code_reviewed', 'text', 'blocks', 'elements')
+
+    def __init__(self, number: int, digest: bytes, screen_type: Optional[str] = None,
+                 code: Optional[str] = None, text: Optional[str] = None,
+                 blocks: Optional[List[Dict]] = None, elements: Optional[List[Dict]] = None):
+        self.number = number
+        self.digest = digest
+        # Classifier tag, and the code region when the frame shows code
+        self.screen_type = screen_type
+        self.code = code
+        # Whether a code-review question was already asked about this code
+        self.code_reviewed = False
+        # Content is only kept for sessions whose client asks for deltas
+        self.text = text
+        self.blocks = blocks
+        self.elements = elements
+
+    @property
+    def has_content(self) -> bool:
+        return self.text is not None
+
+
+class ScreenFrameCache:
+    """
+    Last analyzed screen frame per session, for delta responses
+
+    Every frame gets a per-session number, a digest of its text (for the
+    `changed` flag) and its screen type, with the code region for code
+    frames (for routing the next answer to the code question, once per
+    distinct code region). The frame's text, OCR blocks and UI elements are kept
+    only when the client asked for a delta, since they are what the next
+    delta is computed against. Frames live in this worker's memory; a client
+    whose next frame lands on another worker gets a full response.
+    """
+
+    def __init__(self, max_sessions: int = None):
+        self.max_sessions = max_sessions or int(os.getenv('MAX_SESSIONS', 500))
+        self._frames: OrderedDict[str, FrameSnapshot] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, session_id: str, ocr_result: Dict, ui_result: Dict, keep_content: bool,
+               screen_type: str = None, code: str = None) -> Tuple[FrameSnapshot, Optional[FrameSnapshot]]:
+        """Record a new frame, returning it and the session's previous frame"""
+        text = ocr_result.get('text', '')
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+        with self._lock:
+            previous = self._frames.pop(session_id, None)
+            current = FrameSnapshot((previous.number if previous else 0) + 1, digest, screen_type, code)
+            # The same code captured again stays reviewed
+            current.code_reviewed = bool(code) and previous is not None and previous.code_reviewed \
+                and previous.code == code
+            if keep_content:
+                current.text = text
+                current.blocks = ocr_result.get('text_blocks', [])
+                current.elements = ui_result.get('elements', [])
+            self._frames[session_id] = current
+            while len(self._frames) > self.max_sessions:
+                self._frames.popitem(last=False)
+        return current, previous
+
+    def latest(self, session_id: str) -> Optional[FrameSnapshot]:
+        """The session's last analyzed frame, if this worker has seen one"""
+        with self._lock:
+            return self._frames.get(session_id)
+
+    def mark_code_reviewed(self, session_id: str, code: str):
+        """Note that a code-review question was asked about the session's code on screen"""
+        with self._lock:
+            frame = self._frames.get(session_id)
+            if frame is not None and frame.code == code:
+                frame.code_reviewed = True
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._frames.pop(session_id, None)
+
+
+def diff_text(old: str, new: str) -> List[Dict]:
+    """
+    Line-based edits turning old into new
+
+    Each edit replaces lines [start, end) of the old text with `lines`
+    (start == end is an insertion, empty lines a deletion). Indices refer to
+    the old text, so clients apply the edits from last to first.
+    """
+    old_lines = old.splitlines()
+    new_lines = new.splitlines()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        {'start': i1, 'end': i2, 'lines': new_lines[j1:j2]}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+
+def _diff_items(old: Iterable[Dict], new: Iterable[Dict], key) -> Tuple[List[Dict], List[Dict], int]:
+    """Added and removed items (by key, counting duplicates) and how many are unchanged"""
+    old_counts = Counter(key(item) for item in old)
+    new_counts = Counter(key(item) for item in new)
+
+    added, remaining = [], old_counts.copy()
+    for item in new:
+        item_key = key(item)
+        if remaining[item_key] > 0:
+            remaining[item_key] -= 1
+        else:
+            added.append(item)
+
+    removed, remaining = [], new_counts.copy()
+    for item in old:
+        item_key = key(item)
+        if remaining[item_key] > 0:
+            remaining[item_key] -= 1
+        else:
+            removed.append(item)
+
+    return added, removed, sum((old_counts & new_counts).values())
+
+
+def build_delta(previous: FrameSnapshot, ocr_result: Dict, ui_result: Dict) -> Tuple[Dict, Dict]:
+    """OCR and UI results expressed as changes since the previous frame"""
+    added_blocks, removed_blocks, unchanged_blocks = _diff_items(
+        previous.blocks, ocr_result.get('text_blocks', []), _block_key
+    )
+    ocr_delta = {
+        'success': ocr_result.get('success', False),
+        'confidence': ocr_result.get('confidence', 0),
+        'text_diff': diff_text(previous.text, ocr_result.get('text', '')),
+        'added_blocks': added_blocks,
+        'removed_blocks': removed_blocks,
+        'unchanged_blocks': unchanged_blocks
+    }
+
+    added_elements, removed_elements, _ = _diff_items(
+        previous.elements, ui_result.get('elements', []), _element_key
+    )
+    ui_delta = {
+        'success': ui_result.get('success', False),
+        'count': ui_result.get('count', 0),
+        'added': added_elements,
+        'removed': removed_elements
+    }
+    return ocr_delta, ui_delta
+
+
+def select_fields(result: Dict, fields: Iterable[str], always: Iterable[str] = ()) -> Dict:
+    """
+    Copy of result with only the given fields
+
+    Fields are dotted paths into nested dictionaries ("ocr.text",
+    "ui_elements.count"); a path naming a dictionary keeps all of it. Paths
+    that do not exist are ignored. Keys in `always` are kept regardless.
+    """
+    selected: Dict = {key: result[key] for key in always if key in result}
+    for field in fields:
+        parts = field.split('.')
+        value = result
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = selected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return selected
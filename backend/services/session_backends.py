@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class SessionConflictError(Exception):
+    """Raised when a session was modified by another worker since it was loaded"""
+
+
+class MemorySessionBackend:
+    """
+    Process-local session backend
+
+    Stores serialized session state in a dict. Only useful for a single
+    worker, but keeps the same semantics (versions, conflicts) as the
+    shared backends.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._rows: Dict[str, Tuple[int, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[Tuple[Dict, int]]:
+        row = self._rows.get(session_id)
+        if row is None:
+            return None
+        return json.loads(row[1]), row[0]
+
+    def version(self, session_id: str) -> Optional[int]:
+        row = self._rows.get(session_id)
+        return row[0] if row else None
+
+    def save(self, session_id: str, state: Dict, expected_version: Optional[int] = None) -> int:
+        data = json.dumps(state)
+        with self._lock:
+            current = self._rows.get(session_id)
+            if expected_version is not None and (current is None or current[0] != expected_version):
+                raise SessionConflictError(session_id)
+            version = (current[0] if current else 0) + 1
+            self._rows[session_id] = (version, data, time.time())
+        return version
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._rows.pop(session_id, None)
+
+    def purge_expired(self, max_idle_seconds: float) -> int:
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            expired = [sid for sid, row in self._rows.items() if row[2] < cutoff]
+            for sid in expired:
+                del self._rows[sid]
+        return len(expired)
+
+    def count(self) -> int:
+        return len(self._rows)
+
+
+class SQLiteSessionBackend:
+    """
+    Session backend stored in a SQLite database shared by all workers on a host
+
+    Each row carries a version number; saves only succeed if the version is
+    unchanged since the session was loaded (optimistic concurrency).
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('SESSION_DB_PATH', 'sessions.db')
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            # WAL lets readers in other workers proceed while one worker writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id: str) -> Optional[Tuple[Dict, int]]:
+        row = self._connection().execute(
+            "SELECT data, version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def version(self, session_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, session_id: str, state: Dict, expected_version: Optional[int] = None) -> int:
+        data = json.dumps(state)
+        now = time.time()
+        with self._connection() as conn:
+            if expected_version is None:
+                conn.execute("""
+                    INSERT INTO sessions (session_id, version, data, updated_at) VALUES (?, 1, ?, ?)
+                    ON CONFLICT(session_id) DO UPDATE SET
+                        version = version + 1, data = excluded.data, updated_at = excluded.updated_at
+                """, (session_id, data, now))
+            else:
+                cursor = conn.execute("""
+                    UPDATE sessions SET version = version + 1, data = ?, updated_at = ?
+                    WHERE session_id = ? AND version = ?
+                """, (data, now, session_id, expected_version))
+                if cursor.rowcount != 1:
+                    raise SessionConflictError(session_id)
+            return conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def delete(self, session_id: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self, max_idle_seconds: float) -> int:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_idle_seconds,)
+            )
+            return cursor.rowcount
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class RedisSessionBackend:
+    """
+    Session backend for Redis or any Redis-compatible server (Valkey, KeyDB, ...)
+
+    Sessions are hashes with a version field; saves use WATCH/MULTI so they
+    only succeed if the version is unchanged. Requires the `redis` package.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str = None, key_prefix: str = 'interview:session:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package (pip install redis)")
+
+        self._redis = redis
+        self.client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self.key_prefix = key_prefix
+
+    def _key(self, session_id: str) -> str:
+        return self.key_prefix + session_id
+
+    def load(self, session_id: str) -> Optional[Tuple[Dict, int]]:
+        data, version = self.client.hmget(self._key(session_id), 'data', 'version')
+        if data is None:
+            return None
+        return json.loads(data), int(version)
+
+    def version(self, session_id: str) -> Optional[int]:
+        version = self.client.hget(self._key(session_id), 'version')
+        return int(version) if version is not None else None
+
+    def save(self, session_id: str, state: Dict, expected_version: Optional[int] = None) -> int:
+        key = self._key(session_id)
+        data = json.dumps(state)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.hget(key, 'version')
+                current = int(current) if current is not None else None
+                if expected_version is not None and current != expected_version:
+                    raise SessionConflictError(session_id)
+                version = (current or 0) + 1
+                pipe.multi()
+                pipe.hset(key, mapping={'data': data, 'version': version, 'updated_at': time.time()})
+                pipe.execute()
+            except self._redis.WatchError:
+                raise SessionConflictError(session_id)
+        return version
+
+    def delete(self, session_id: str):
+        self.client.delete(self._key(session_id))
+
+    def purge_expired(self, max_idle_seconds: float) -> int:
+        cutoff = time.time() - max_idle_seconds
+        purged = 0
+        for key in self.client.scan_iter(match=self.key_prefix + '*'):
+            updated_at = self.client.hget(key, 'updated_at')
+            if updated_at is not None and float(updated_at) < cutoff:
+                purged += self.client.delete(key)
+        return purged
+
+    def count(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.key_prefix + '*'))
+
+
+def create_session_backend(name: str = None):
+    """Build the session backend selected by SESSION_BACKEND (none, memory, sqlite, redis)"""
+    name = (name or os.getenv('SESSION_BACKEND', 'none')).lower()
+    if name in ('', 'none'):
+        return None
+    if name == 'memory':
+        return MemorySessionBackend()
+    if name == 'sqlite':
+        return SQLiteSessionBackend()
+    if name == 'redis':
+        return RedisSessionBackend()
+    raise ValueError(f"Unknown SESSION_BACKEND: {name}")
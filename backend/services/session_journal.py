@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class SessionJournal:
+    """
+    Append-only, write-behind journal of interview session events
+
+    Request handlers call `record`, which only appends an encoded line to an
+    in-memory buffer. A background task hands the buffer to a dedicated I/O
+    thread every `flush_interval` seconds, where it is appended to the
+    journal file and fsynced. After `compact_after` events the live sessions
+    are written to a snapshot file and the journal is truncated.
+
+    On startup `replay` loads the snapshot and applies the journal on top of
+    it to rebuild the serialized state of every session that was in progress.
+
+    The journal belongs to a single process: workers sharing one file would
+    each replay every session and truncate each other's events on
+    compaction.
+    """
+
+    def __init__(self, path: str = None, flush_interval: float = None, compact_after: int = None):
+        self.path = path or os.getenv('SESSION_JOURNAL_PATH', 'sessions.journal')
+        self.snapshot_path = self.path + '.snapshot'
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv('SESSION_JOURNAL_FSYNC_INTERVAL', 1.0))
+        self.compact_after = compact_after if compact_after is not None else int(os.getenv('SESSION_JOURNAL_COMPACT_EVENTS', 5000))
+
+        self._buffer: List[str] = []
+        self._events_since_compaction = 0
+        self._snapshot_provider: Optional[Callable[[], Dict[str, Dict]]] = None
+        self._task: Optional[asyncio.Task] = None
+        # A single I/O thread keeps writes, fsyncs and compactions in order
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='session-journal')
+        self._file = None
+
+    def record(self, event: str, session_id: str, **data):
+        """Queue an event; no I/O happens on the caller's path"""
+        self._buffer.append(json.dumps({
+            'event': event,
+            'session_id': session_id,
+            'time': time.time(),
+            'data': data
+        }) + "\n")
+
+    def start(self, snapshot_provider: Callable[[], Dict[str, Dict]]):
+        """
+        Start the background flusher on the running event loop
+
+        The snapshot provider returns the serialized state of every live
+        session. It is called on the event loop and its result is encoded on
+        the I/O thread, so it must return copies that live sessions do not
+        go on to modify.
+        """
+        self._snapshot_provider = snapshot_provider
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the flusher and write out anything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._io, self._close)
+
+    async def flush(self):
+        """Write buffered events to disk and fsync"""
+        lines, self._buffer = self._buffer, []
+        if lines:
+            self._events_since_compaction += len(lines)
+            await asyncio.get_running_loop().run_in_executor(self._io, self._write, lines)
+
+    async def compact(self):
+        """Replace the journal with a snapshot of the live sessions"""
+        # Taking the snapshot and clearing the buffer without awaiting in
+        # between means every buffered event is already in the snapshot
+        self._buffer = []
+        self._events_since_compaction = 0
+        snapshot = {
+            'time': time.time(),
+            'sessions': self._snapshot_provider() if self._snapshot_provider else {}
+        }
+        # Encoding every session's history is the expensive part; it happens
+        # on the I/O thread so requests are not held up meanwhile
+        await asyncio.get_running_loop().run_in_executor(self._io, self._write_snapshot, snapshot)
+
+    def replay(self) -> Dict[str, Dict]:
+        """Rebuild serialized session states from the snapshot and journal"""
+        states: Dict[str, Dict] = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                states = json.load(f).get('sessions', {})
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write at the end of the journal
+                        break
+                    apply_event(states, entry['event'], entry['session_id'], entry['data'])
+
+        return states
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if self._events_since_compaction >= self.compact_after:
+                    await self.compact()
+            except Exception as e:
+                print(f"Session journal error: {str(e)}")
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _write(self, lines: List[str]):
+        f = self._open()
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _write_snapshot(self, snapshot: Dict):
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        # Events written before the snapshot are now redundant
+        self._close()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            os.fsync(f.fileno())
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def apply_event(states: Dict[str, Dict], event: str, session_id: str, data: Dict):
+    """Apply one journal event to serialized session states"""
+    if event == 'session_started':
+        states[session_id] = data['state']
+        return
+    if event == 'session_ended':
+        states.pop(session_id, None)
+        return
+
+    state = states.get(session_id)
+    if state is None:
+        return
+
+    if event == 'context_updated':
+        context = state['interviewer']['project_context']
+        if data.get('screen_text'):
+            context['screen_content'].append(data['screen_text'])
+        if data.get('speech_text'):
+            context['speech_transcripts'].append(data['speech_text'])
+    elif event == 'response_received':
+        state['responses'].append(data['response'])
+    elif event == 'question_asked':
+        state['interviewer']['conversation_history'].extend(data['history'])
+        state['question_count'] = data['question_count']
+    elif event == 'evaluated':
+        state['evaluation'] = data['evaluation']
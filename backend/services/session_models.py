@@ -0,0 +1,155 @@
+from enum import Enum
+from typing import Dict, List, Optional
+
+from services.context_index import ContextIndex
+
+
+class EntryType(str, Enum):
+    """Kind of conversation history entry"""
+    QUESTION = 'question'
+    STUDENT_RESPONSE = 'student_response'
+
+
+class ConversationEntry:
+    """One question or student response in the conversation history"""
+
+    __slots__ = ('type', 'content')
+
+    def __init__(self, type: EntryType, content: str):
+        self.type = EntryType(type)
+        self.content = content
+
+    def to_dict(self) -> Dict:
+        return {'type': self.type.value, 'content': self.content}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ConversationEntry':
+        return cls(data['type'], data['content'])
+
+
+class ResponseRecord:
+    """A submitted student response and the screen it was given for"""
+
+    __slots__ = ('response', 'screen_context', 'question_number')
+
+    def __init__(self, response: str, screen_context: Optional[str], question_number: int):
+        self.response = response
+        self.screen_context = screen_context
+        self.question_number = question_number
+
+    def to_dict(self) -> Dict:
+        return {
+            'response': self.response,
+            'screen_context': self.screen_context,
+            'question_number': self.question_number
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ResponseRecord':
+        return cls(data['response'], data.get('screen_context'), data['question_number'])
+
+
+class ProjectContext:
+    """
+    Screen and speech content captured during an interview
+
+    Screen text is stored content-addressed: a capture identical to an earlier
+    one reuses the same string object instead of keeping another copy, which
+    matters because the same slide or editor window is captured many times.
+
+    Screen and speech text is also searchable through relevant_fragments. The
+    index is brought up to date on each search rather than on each capture,
+    so contexts that are restored and saved without being searched never pay
+    for it.
+    """
+
+    __slots__ = ('screen_content', 'speech_transcripts', 'identified_topics', '_texts', '_index')
+
+    def __init__(self):
+        self.screen_content: List[str] = []
+        self.speech_transcripts: List[str] = []
+        self.identified_topics: List[str] = []
+        self._texts: Dict[str, str] = {}
+        self._index = ContextIndex()
+
+    def add_screen_text(self, text: str):
+        self.screen_content.append(self._texts.setdefault(text, text))
+
+    def add_speech_text(self, text: str):
+        self.speech_transcripts.append(text)
+
+    def relevant_fragments(self, query: str, top_k: int = 5) -> List[Dict]:
+        """Screen and speech fragments most relevant to the query, best first"""
+        self._index.sync(self.screen_content, self.speech_transcripts)
+        return self._index.search(query, top_k)
+
+    def get(self, key: str, default=None):
+        """Dict-style read access, for callers that expect the old layout"""
+        if key in ('screen_content', 'speech_transcripts', 'identified_topics'):
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in ('screen_content', 'speech_transcripts', 'identified_topics'):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict:
+        return {
+            'screen_content': list(self.screen_content),
+            'speech_transcripts': list(self.speech_transcripts),
+            'identified_topics': list(self.identified_topics)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProjectContext':
+        context = cls()
+        for text in data.get('screen_content', []):
+            context.add_screen_text(text)
+        context.speech_transcripts = list(data.get('speech_transcripts', []))
+        context.identified_topics = list(data.get('identified_topics', []))
+        return context
+
+
+class InterviewSession:
+    """State of one interview held in the session store"""
+
+    __slots__ = ('student_name', 'project_name', 'interviewer', 'started_at',
+                 'question_count', 'responses', 'evaluation')
+
+    def __init__(self, interviewer, student_name: str = None, project_name: str = None,
+                 started_at: float = None):
+        self.student_name = student_name
+        self.project_name = project_name
+        self.interviewer = interviewer
+        self.started_at = started_at
+        self.question_count = 0
+        self.responses: List[ResponseRecord] = []
+        # Cached evaluation: {'key': ..., 'evaluation': ..., 'report': ...}
+        self.evaluation: Optional[Dict] = None
+
+    def to_state(self) -> Dict:
+        """Serialize to JSON-compatible data"""
+        return {
+            'student_name': self.student_name,
+            'project_name': self.project_name,
+            'started_at': self.started_at,
+            'question_count': self.question_count,
+            'responses': [response.to_dict() for response in self.responses],
+            'evaluation': self.evaluation,
+            'interviewer': self.interviewer.get_state()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, interviewer) -> 'InterviewSession':
+        """Rebuild a session from to_state data and a restored interviewer"""
+        session = cls(
+            interviewer,
+            student_name=state.get('student_name'),
+            project_name=state.get('project_name'),
+            started_at=state.get('started_at')
+        )
+        session.question_count = state.get('question_count', 0)
+        session.responses = [ResponseRecord.from_dict(data) for data in state.get('responses', [])]
+        session.evaluation = state.get('evaluation')
+        return session
@@ -0,0 +1,364 @@
+import asyncio
+import os
+import sys
+import time
+import types
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from services.session_backends import SessionConflictError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class SessionStore:
+    """
+    In-memory interview session store with bounded size
+
+    Reads behave like a dict of session_id -> session, but sessions that have
+    not been accessed for `ttl_seconds` expire, and once `max_sessions` is
+    reached the least recently used session is evicted to make room. Expired
+    sessions are removed lazily on access and periodically by a background
+    sweeper.
+
+    With a backend, the store becomes a local cache of shared session state.
+    `fetch` checks the cached copy against the backend (reloading it when
+    another worker saved a newer version), `put` and `commit` write sessions
+    back, and `commit` uses the version number for optimistic concurrency.
+    These are coroutines: backend calls run in a small thread pool so the
+    event loop never waits on SQLite or Redis. `in` and `[]` only look at
+    the local cache.
+    """
+
+    def __init__(self, ttl_seconds: float = None, max_sessions: int = None,
+                 sweep_interval: float = None, backend=None,
+                 serializer: Callable[[Dict], Dict] = None,
+                 deserializer: Callable[[Dict], Dict] = None,
+                 on_remove: Callable[[str, str], None] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv('SESSION_TTL_SECONDS', 1800))
+        self.max_sessions = max_sessions if max_sessions is not None else int(os.getenv('MAX_SESSIONS', 500))
+        self.sweep_interval = sweep_interval if sweep_interval is not None else float(os.getenv('SESSION_SWEEP_INTERVAL', 60))
+
+        self.backend = backend
+        self.serializer = serializer
+        self.deserializer = deserializer
+        # Called with (session_id, reason) when a session is ended, expires or is evicted
+        self.on_remove = on_remove
+
+        # session_id -> [session, last access time, backend version],
+        # least recently used first
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._executor = None
+        if backend is not None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('SESSION_BACKEND_WORKERS', 4)),
+                thread_name_prefix='session-backend'
+            )
+        # Serializes commits of one session within this worker
+        self._commit_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._counters = {
+            'created': 0,
+            'ended': 0,
+            'expired': 0,
+            'evicted': 0
+        }
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._local(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> Dict:
+        entry = self._local(session_id)
+        if entry is None:
+            raise KeyError(session_id)
+        return self._touch(session_id, entry)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._sessions))
+
+    def sessions(self) -> Dict[str, Dict]:
+        """Locally held sessions, without touching access times or the backend"""
+        return {session_id: entry[0] for session_id, entry in self._sessions.items()}
+
+    def get(self, session_id: str, default=None):
+        try:
+            return self[session_id]
+        except KeyError:
+            return default
+
+    async def fetch(self, session_id: str) -> Optional[Dict]:
+        """
+        A session, up to date with the backend
+
+        Makes one backend round trip for a cached session (its version), and
+        loads the session only when it is not cached or another worker saved
+        a newer version.
+
+        Returns:
+            The session, or None if it does not exist (or was ended by
+            another worker)
+        """
+        entry = self._local(session_id)
+        if self.backend is None:
+            return self._touch(session_id, entry) if entry is not None else None
+
+        version, loaded = await self._run(self._lookup, session_id, entry[2] if entry is not None else None)
+        current = self._sessions.get(session_id)
+        if version is None:
+            if current is None:
+                return None
+            if current is entry:
+                # Ended by another worker
+                self._remove(session_id, 'ended')
+                return None
+        if loaded is not None and (current is None or current[2] is None or version > current[2]):
+            self._sessions.pop(session_id, None)
+            current = self._cache(session_id, loaded, version)
+        if current is None:
+            # Evicted locally while the backend was checked
+            return await self.fetch(session_id)
+        return self._touch(session_id, current)
+
+    async def put(self, session_id: str, session: Dict):
+        """Store a new session (or replace one), saving it to the backend"""
+        version = None
+        if self.backend is not None:
+            version = await self._run(self.backend.save, session_id, self.serializer(session))
+
+        if session_id in self._sessions:
+            self._sessions.pop(session_id)
+        else:
+            self._counters['created'] += 1
+        self._cache(session_id, session, version)
+
+    async def end(self, session_id: str) -> bool:
+        """End a session here and in the backend, returning False if it does not exist"""
+        if await self.fetch(session_id) is None:
+            return False
+        if self.backend is not None:
+            await self._run(self.backend.delete, session_id)
+        if session_id in self._sessions:
+            self._remove(session_id, 'ended')
+        return True
+
+    async def commit(self, session_id: str, reapply: Callable[[Dict], None] = None,
+                     retries: int = 3, session: Dict = None) -> Optional[Dict]:
+        """
+        Write a modified session back to the backend
+
+        Args:
+            session_id: Session to save
+            reapply: Applies this request's change to a freshly loaded session;
+                used to retry when another worker saved the session first
+            retries: How many times to reload and reapply on conflict
+            session: The session object the caller modified; if the cached
+                copy was reloaded in the meantime the change is reapplied to it
+
+        Returns:
+            The saved session, which is a reloaded copy if a retry was needed
+
+        Raises:
+            SessionConflictError: The session changed concurrently and could
+                not be merged
+        """
+        if self.backend is None:
+            entry = self._sessions.get(session_id)
+            return entry[0] if entry is not None else None
+
+        lock = self._commit_locks.get(session_id)
+        if lock is None:
+            lock = self._commit_locks[session_id] = asyncio.Lock()
+        async with lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if session is not None and entry[0] is not session:
+                # Reloaded by another request while the caller was working on its copy
+                if reapply is None:
+                    raise SessionConflictError(session_id)
+                reapply(entry[0])
+
+            for attempt in range(retries + 1):
+                # Serialized here, on the event loop, so the saved state is
+                # never a half-applied change
+                state = self.serializer(entry[0])
+                try:
+                    entry[2] = await self._run(self.backend.save, session_id, state, entry[2])
+                    return entry[0]
+                except SessionConflictError:
+                    # Drop the stale copy; the next access reloads it
+                    if self._sessions.get(session_id) is entry:
+                        self._sessions.pop(session_id)
+                    if reapply is None or attempt == retries:
+                        raise
+                    entry = await self._reload(session_id)
+                    if entry is None:
+                        raise
+                    reapply(entry[0])
+
+    async def sweep(self) -> int:
+        """Remove every expired session and return how many were removed"""
+        expired = [
+            session_id for session_id, entry in self._sessions.items()
+            if self._is_expired(entry)
+        ]
+        for session_id in expired:
+            self._remove(session_id, 'expired')
+        if self.backend is not None and self.ttl_seconds > 0:
+            return len(expired) + await self._run(self.backend.purge_expired, self.ttl_seconds)
+        return len(expired)
+
+    def start_sweeper(self):
+        """Start the background sweeper on the running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_periodically())
+
+    async def stop_sweeper(self):
+        """Stop the background sweeper"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def stats(self) -> Dict:
+        """Session counts and memory usage"""
+        seen = set()
+        session_bytes = sum(_deep_sizeof(entry[0], seen) for entry in self._sessions.values())
+
+        return {
+            'backend': self.backend.name if self.backend is not None else None,
+            'stored_sessions': await self._run(self.backend.count) if self.backend is not None else len(self._sessions),
+            'active_sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'sessions_created': self._counters['created'],
+            'sessions_ended': self._counters['ended'],
+            'sessions_expired': self._counters['expired'],
+            'sessions_evicted': self._counters['evicted'],
+            'estimated_session_bytes': session_bytes,
+            'avg_bytes_per_session': session_bytes // len(self._sessions) if self._sessions else 0,
+            'process_max_rss_bytes': _max_rss_bytes()
+        }
+
+    async def _sweep_periodically(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            expired = await self.sweep()
+            if expired:
+                print(f"Session sweeper removed {expired} expired session(s)")
+
+    def _is_expired(self, entry: list) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - entry[1] > self.ttl_seconds
+
+    def _local(self, session_id: str) -> Optional[list]:
+        """The locally cached entry, dropping it if it expired"""
+        entry = self._sessions.get(session_id)
+        if entry is not None and self._is_expired(entry):
+            self._remove(session_id, 'expired')
+            return None
+        return entry
+
+    def _touch(self, session_id: str, entry: list) -> Dict:
+        entry[1] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return entry[0]
+
+    async def _run(self, func, *args):
+        """Run a blocking backend call in the store's thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _lookup(self, session_id: str, cached_version: Optional[int]) -> Tuple[Optional[int], Optional[Dict]]:
+        """
+        Backend side of fetch, run in the thread pool
+
+        Returns the backend version (None if the session is not stored) and
+        the deserialized session if it had to be loaded.
+        """
+        if cached_version is not None:
+            version = self.backend.version(session_id)
+            if version is None or version == cached_version:
+                return version, None
+        loaded = self.backend.load(session_id)
+        if loaded is None:
+            return None, None
+        state, version = loaded
+        return version, self.deserializer(state)
+
+    async def _reload(self, session_id: str) -> Optional[list]:
+        """Load a session from the backend into the local cache"""
+        version, loaded = await self._run(self._lookup, session_id, None)
+        if loaded is None:
+            return None
+        self._sessions.pop(session_id, None)
+        return self._cache(session_id, loaded, version)
+
+    def _cache(self, session_id: str, session: Dict, version: Optional[int]) -> list:
+        entry = [session, time.monotonic(), version]
+        self._sessions[session_id] = entry
+
+        while len(self._sessions) > self.max_sessions:
+            oldest_id = next(iter(self._sessions))
+            self._remove(oldest_id, 'evicted')
+        return entry
+
+    def _remove(self, session_id: str, reason: str) -> Dict:
+        # Only leaves the local cache: end() deletes ended sessions from the
+        # backend, which purges idle sessions itself in sweep()
+        session = self._sessions.pop(session_id)[0]
+        self._counters[reason] += 1
+        if self.on_remove is not None:
+            self.on_remove(session_id, reason)
+        return session
+
+
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType)
+
+# Attributes holding objects shared by every session (the OpenAI client and
+# its connection pool), which are not part of a session's own footprint
+_SKIPPED_ATTRIBUTES = frozenset({'client'})
+
+
+def _deep_sizeof(obj, seen: set) -> int:
+    """Approximate memory footprint of an object and everything it references"""
+    if isinstance(obj, _SKIPPED_TYPES) or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif not isinstance(obj, (str, bytes, int, float, bool)):
+        attributes = getattr(obj, '__dict__', None)
+        if attributes is not None and id(attributes) not in seen:
+            seen.add(id(attributes))
+            size += sys.getsizeof(attributes, 0)
+            size += sum(_deep_sizeof(name, seen) + _deep_sizeof(value, seen)
+                        for name, value in attributes.items() if name not in _SKIPPED_ATTRIBUTES)
+        slots = getattr(type(obj), '__slots__', ())
+        for slot in ((slots,) if isinstance(slots, str) else slots):
+            if slot not in _SKIPPED_ATTRIBUTES and hasattr(obj, slot):
+                size += _deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def _max_rss_bytes() -> int:
+    """Peak resident set size of the process, or 0 if unavailable"""
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
@@ -1,14 +1,15 @@
-import os
-from openai import OpenAI
 import base64
 import io
 from typing import Dict
 
+from services.metrics import timed
+from services.openai_client import get_openai_client
+
 class STTService:
     """Service for converting speech to text using OpenAI Whisper"""
     
     def __init__(self, api_key: str = None):
-        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+        self.client = get_openai_client(api_key)
     
     def transcribe_audio(self, audio_data: bytes, format: str = "webm") -> Dict:
         """
@@ -27,11 +28,12 @@ class STTService:
             audio_file.name = f"audio.{format}"
             
             # Transcribe using Whisper
-            transcript = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json"
-            )
+            with timed('whisper_upload'):
+                transcript = self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="verbose_json"
+                )
             
             return {
                 'success': True,
@@ -66,7 +68,8 @@ class STTService:
                 base64_audio = base64_audio.split(',')[1]
             
             # Decode base64 to bytes
-            audio_data = base64.b64decode(base64_audio)
+            with timed('stt_base64_decode'):
+                audio_data = base64.b64decode(base64_audio)
             
             return self.transcribe_audio(audio_data, format)
             
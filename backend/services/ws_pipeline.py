@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+
+class LatestValueSlot:
+    """Holds only the newest pending item; putting a new item replaces the old one"""
+
+    def __init__(self):
+        self._item = None
+        self._has_item = False
+        self._ready = asyncio.Event()
+
+    def put(self, item) -> bool:
+        """Store item, returning True if an unprocessed item was dropped"""
+        dropped = self._has_item
+        self._item = item
+        self._has_item = True
+        self._ready.set()
+        return dropped
+
+    async def get(self):
+        while not self._has_item:
+            await self._ready.wait()
+        item, self._item, self._has_item = self._item, None, False
+        self._ready.clear()
+        return item
+
+    def qsize(self) -> int:
+        return 1 if self._has_item else 0
+
+
+class InterviewConnection:
+    """
+    Concurrent message pipeline for one interview WebSocket
+
+    A receive loop reads messages and routes them to one worker per message
+    type (or per shared lane), so a slow OCR job never delays audio
+    transcription or pings. Message types registered with `latest_only` keep
+    just the newest pending message (stale screen frames are dropped); others
+    are processed in order from a bounded queue. A message arriving while its
+    queue is full is rejected with an error event, so the receive loop never
+    waits and a backlog of one type cannot hold up the others. Results go
+    through a bounded outbound queue drained by a single sender task, with
+    priority messages (pong, stats, errors) sent ahead of queued results;
+    those are bounded too, keeping only the newest.
+    """
+
+    def __init__(self, websocket, send_queue_size: int = None, queue_size: int = None):
+        self.websocket = websocket
+        self.queue_size = queue_size or int(os.getenv('WS_QUEUE_SIZE', 8))
+        self.send_queue: asyncio.Queue = asyncio.Queue(maxsize=send_queue_size or int(os.getenv('WS_SEND_QUEUE_SIZE', 32)))
+        self._priority = deque(maxlen=self.send_queue.maxsize)
+        self._outbound = asyncio.Event()
+        self._handlers: Dict[str, Dict] = {}
+        self._lanes: Dict[str, object] = {}
+        self._started = time.monotonic()
+        # Handlers running with finish_on_disconnect
+        self._finishing = set()
+        self._stats = {
+            'received': {},
+            'processed': {},
+            'dropped': {},
+            'errors': {},
+            'processing_seconds': {},
+            'sent': 0,
+            'priority_dropped': 0,
+            'max_send_queue_depth': 0
+        }
+
+    def register(self, message_type: str, handler: Callable[[Dict], Dict],
+                 latest_only: bool = False, blocking: bool = True, lane: str = None,
+                 finish_on_disconnect: bool = False):
+        """
+        Route a message type to its own worker
+
+        Args:
+            message_type: Value of the message's 'type' field
+            handler: Called with the message, returns the payload to send back
+                (or None to send nothing); coroutine functions are awaited
+            latest_only: Keep only the newest pending message of this type
+            blocking: Run a plain function in the thread pool so it does not
+                block the event loop
+            lane: Share one worker with other message types registered on the
+                same lane, so they are processed strictly in arrival order
+            finish_on_disconnect: Let a message of this type that is being
+                processed when the client disconnects run to completion
+                instead of cancelling it half-way (its result is not sent)
+        """
+        lane = lane or message_type
+        if lane not in self._lanes:
+            self._lanes[lane] = LatestValueSlot() if latest_only else asyncio.Queue(maxsize=self.queue_size)
+        self._handlers[message_type] = {
+            'handler': handler,
+            'blocking': blocking,
+            'pending': self._lanes[lane],
+            'finish_on_disconnect': finish_on_disconnect
+        }
+        for counter in ('received', 'processed', 'dropped', 'errors', 'processing_seconds'):
+            self._stats[counter].setdefault(message_type, 0)
+
+    async def run(self):
+        """Process the connection until the client disconnects"""
+        tasks = [asyncio.create_task(self._send_loop())]
+        tasks += [
+            asyncio.create_task(self._work_loop(lane))
+            for lane in self._lanes
+        ]
+        try:
+            await self._receive_loop()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Handlers shielded from the cancellation still change session
+            # state; wait for them so a step is never left half-applied
+            await asyncio.gather(*self._finishing, return_exceptions=True)
+
+    async def send(self, payload: Dict):
+        """Queue a payload, waiting while the outbound queue is full"""
+        await self.send_queue.put(payload)
+        self._stats['max_send_queue_depth'] = max(self._stats['max_send_queue_depth'], self.send_queue.qsize())
+        self._outbound.set()
+
+    def send_priority(self, payload: Dict):
+        """Send a payload ahead of any queued results, dropping the oldest if too many are waiting"""
+        if len(self._priority) == self._priority.maxlen:
+            self._stats['priority_dropped'] += 1
+        self._priority.append(payload)
+        self._outbound.set()
+
+    def stats(self) -> Dict:
+        """Per-connection counters and queue depths"""
+        processing = self._stats['processing_seconds']
+        return {
+            'uptime': round(time.monotonic() - self._started, 3),
+            'received': dict(self._stats['received']),
+            'processed': dict(self._stats['processed']),
+            'dropped': dict(self._stats['dropped']),
+            'errors': dict(self._stats['errors']),
+            'avg_processing_ms': {
+                message_type: round(processing[message_type] / count * 1000, 2)
+                for message_type, count in self._stats['processed'].items() if count
+            },
+            'pending': {
+                lane: pending.qsize()
+                for lane, pending in self._lanes.items()
+            },
+            'sent': self._stats['sent'],
+            'priority_dropped': self._stats['priority_dropped'],
+            'send_queue_depth': self.send_queue.qsize(),
+            'send_queue_size': self.send_queue.maxsize,
+            'max_send_queue_depth': self._stats['max_send_queue_depth']
+        }
+
+    async def _receive_loop(self):
+        while True:
+            data = await self.websocket.receive_text()
+            try:
+                message = json.loads(data)
+                message_type = message['type']
+                if not isinstance(message_type, str):
+                    raise TypeError(message_type)
+            except (ValueError, KeyError, TypeError):
+                self.send_priority({'type': 'error', 'error': 'Invalid message'})
+                continue
+
+            # Answered straight from the receive loop, never queued behind work
+            if message_type == 'ping':
+                self.send_priority({'type': 'pong'})
+                continue
+            if message_type == 'stats':
+                self.send_priority({'type': 'stats', 'result': self.stats()})
+                continue
+
+            route = self._handlers.get(message_type)
+            if route is None:
+                self.send_priority({
+                    'type': 'error',
+                    'message_type': message_type,
+                    'error': f"Unknown message type: {message_type}",
+                    'status_code': 400
+                })
+                continue
+
+            self._stats['received'][message_type] += 1
+            pending = route['pending']
+            if isinstance(pending, LatestValueSlot):
+                if pending.put(message):
+                    self._stats['dropped'][message_type] += 1
+            else:
+                try:
+                    pending.put_nowait(message)
+                except asyncio.QueueFull:
+                    # Reject rather than wait: waiting would stop reading the
+                    # socket and hold up every other message type
+                    self._stats['dropped'][message_type] += 1
+                    self.send_priority({
+                        'type': 'error',
+                        'message_type': message_type,
+                        'error': f"Too many pending {message_type} messages, try again later",
+                        'status_code': 429
+                    })
+
+    async def _work_loop(self, lane: str):
+        pending = self._lanes[lane]
+        loop = asyncio.get_running_loop()
+
+        while True:
+            message = await pending.get()
+            message_type = message['type']
+            route = self._handlers[message_type]
+            started = time.perf_counter()
+            try:
+                if route['finish_on_disconnect']:
+                    task = asyncio.ensure_future(self._handle(route, message, loop))
+                    self._finishing.add(task)
+                    task.add_done_callback(self._finishing.discard)
+                    payload = await asyncio.shield(task)
+                else:
+                    payload = await self._handle(route, message, loop)
+            except Exception as e:
+                self._stats['errors'][message_type] += 1
+                payload = {
+                    'type': 'error',
+                    'message_type': message_type,
+                    # HTTPException carries its message in detail
+                    'error': getattr(e, 'detail', None) or str(e),
+                    'status_code': getattr(e, 'status_code', 500)
+                }
+            finally:
+                self._stats['processed'][message_type] += 1
+                self._stats['processing_seconds'][message_type] += time.perf_counter() - started
+
+            if payload is not None:
+                await self.send(payload)
+
+    async def _handle(self, route: Dict, message: Dict, loop) -> Optional[Dict]:
+        if asyncio.iscoroutinefunction(route['handler']):
+            return await route['handler'](message)
+        if route['blocking']:
+            return await loop.run_in_executor(None, route['handler'], message)
+        return route['handler'](message)
+
+    async def _send_loop(self):
+        while True:
+            payload: Optional[Dict] = None
+            if self._priority:
+                payload = self._priority.popleft()
+            elif not self.send_queue.empty():
+                payload = self.send_queue.get_nowait()
+            else:
+                self._outbound.clear()
+                await self._outbound.wait()
+                continue
+
+            await self.websocket.send_json(payload)
+            self._stats['sent'] += 1
@@ -0,0 +1,57 @@
+"""
+BM25 ranking, de-duplication and the size cap of the context index.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.context_index import ContextIndex, tokenize
+
+
+def test_identifiers_match_their_parts():
+    assert {'user', 'name'} <= set(tokenize("getUserName"))
+    assert {'user', 'name'} <= set(tokenize("get_user_name"))
+
+
+def test_most_relevant_fragment_ranks_first():
+    index = ContextIndex()
+    index.add("The login form posts credentials to the auth service", 'screen')
+    index.add("Sessions are cached in Redis with a thirty minute TTL", 'speech')
+    index.add("Redis cache eviction uses LRU when memory is full", 'screen')
+
+    results = index.search("how does the redis cache evict entries", top_k=2)
+    assert [result['text'] for result in results] == [
+        "Redis cache eviction uses LRU when memory is full",
+        "Sessions are cached in Redis with a thirty minute TTL"
+    ]
+    assert index.search("redis", sources=['speech'])[0]['source'] == 'speech'
+    assert index.search("kubernetes") == []
+
+
+def test_repeated_captures_are_indexed_once():
+    index = ContextIndex()
+    screen = ["def handler(request):\n    return process(request)"] * 3
+    index.sync(screen, [])
+    assert len(index) == 1
+
+    screen.append("class Worker:\n    def run(self): pass")
+    index.sync(screen, ["The worker runs jobs."])
+    assert len(index) == 3
+
+
+def test_oldest_fragments_are_dropped_beyond_the_cap():
+    index = ContextIndex(max_fragments=3)
+    for step in range(5):
+        index.add(f"cache eviction step{step}", 'screen')
+
+    assert len(index) == 3
+    texts = [result['text'] for result in index.search("cache eviction", top_k=5)]
+    assert sorted(texts) == ["cache eviction step2", "cache eviction step3", "cache eviction step4"]
+    # Dropped fragments leave no postings behind and can be indexed again
+    assert 'step0' not in index._postings
+    index.add("cache eviction step0", 'screen')
+    assert index.search("step0")[0]['text'] == "cache eviction step0"
@@ -0,0 +1,72 @@
+"""
+Screen frame tracking and delta responses.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.screen_delta import ScreenFrameCache, build_delta, diff_text
+
+
+def _ocr(text: str):
+    blocks = [
+        {'text': word, 'confidence': 90, 'position': {'x': 10 * i, 'y': 0, 'width': 9, 'height': 12}}
+        for i, word in enumerate(text.split())
+    ]
+    return {'success': True, 'text': text, 'text_blocks': blocks, 'confidence': 90}
+
+
+UI = {'success': True, 'elements': [], 'count': 0}
+
+
+def _apply(old: str, edits) -> str:
+    lines = old.splitlines()
+    for edit in reversed(edits):
+        lines[edit['start']:edit['end']] = edit['lines']
+    return "\n".join(lines)
+
+
+def test_text_diff_rebuilds_new_text():
+    old = "def f(x):\n    return x\n\nprint(f(1))"
+    new = "def f(x, y):\n    return x + y\n\nprint(f(1))\nprint(f(2))"
+    assert _apply(old, diff_text(old, new)) == new
+
+
+def test_delta_is_only_available_against_a_frame_with_content():
+    frames = ScreenFrameCache()
+    first, previous = frames.update('s', _ocr("alpha beta"), UI, keep_content=False)
+    assert (first.number, previous) == (1, None)
+
+    # The first frame kept no content, so the client must get a full result
+    second, previous = frames.update('s', _ocr("alpha gamma"), UI, keep_content=True)
+    assert second.number == 2 and not previous.has_content
+
+    third, previous = frames.update('s', _ocr("alpha gamma delta"), UI, keep_content=True)
+    assert previous is second and previous.has_content
+    ocr_delta, _ = build_delta(previous, _ocr("alpha gamma delta"), UI)
+    assert [block['text'] for block in ocr_delta['added_blocks']] == ['delta']
+    assert ocr_delta['unchanged_blocks'] == 2
+    assert _apply(second.text, ocr_delta['text_diff']) == "alpha gamma delta"
+
+
+def test_unchanged_frame_keeps_digest():
+    frames = ScreenFrameCache()
+    first, _ = frames.update('s', _ocr("same text"), UI, keep_content=False)
+    second, previous = frames.update('s', _ocr("same text"), UI, keep_content=False)
+    assert previous.digest == second.digest
+    assert second.number == first.number + 1
+
+
+def test_code_stays_reviewed_until_it_changes():
+    frames = ScreenFrameCache()
+    frames.update('s', _ocr("x = 1"), UI, keep_content=False, screen_type='code', code="x = 1")
+    frames.mark_code_reviewed('s', "x = 1")
+    frame, _ = frames.update('s', _ocr("x = 1 "), UI, keep_content=False, screen_type='code', code="x = 1")
+    assert frame.code_reviewed
+
+    frame, _ = frames.update('s', _ocr("x = 2"), UI, keep_content=False, screen_type='code', code="x = 2")
+    assert not frame.code_reviewed
@@ -0,0 +1,76 @@
+"""
+Journal replay must rebuild exactly the live session state, including when a
+compaction runs while a question is being generated.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import importlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault('OPENAI_API_KEY', 'fake')
+os.environ['WARMUP'] = 'false'
+os.environ['SESSION_JOURNAL_PATH'] = os.path.join(tempfile.mkdtemp(), 'sessions.journal')
+# Only explicit flushes and compactions in these tests
+os.environ['SESSION_JOURNAL_FSYNC_INTERVAL'] = '3600'
+
+from fastapi.testclient import TestClient
+
+import services.openai_client as openai_client
+from services.fake_llm import FakeOpenAI
+
+
+class CompactingLLM(FakeOpenAI):
+    """Fake client that compacts the journal in the middle of chosen calls"""
+
+    def __init__(self):
+        super().__init__()
+        self.compact = None
+        create = self.chat.completions.create
+
+        def create_and_compact(**kwargs):
+            if self.compact is not None:
+                self.compact()
+            return create(**kwargs)
+
+        self.chat.completions.create = create_and_compact
+
+
+@pytest.fixture
+def app():
+    llm = CompactingLLM()
+    openai_client._client = llm
+    main = importlib.import_module('main')
+    with TestClient(main.app) as client:
+        yield main, client, llm
+
+
+def _replayed(main, client, session_id):
+    client.portal.call(main.session_journal.flush)
+    return main.session_journal.replay()[session_id]
+
+
+def test_compaction_during_response_does_not_duplicate_changes(app):
+    main, client, llm = app
+    llm.compact = lambda: client.portal.call(main.session_journal.compact)
+
+    response = client.post('/api/interview/start', json={'session_id': 's1'})
+    assert response.status_code == 200
+    response = client.post('/api/interview/respond', json={
+        'session_id': 's1', 'response_text': 'It caches sessions in Redis'
+    })
+    assert response.status_code == 200
+    llm.compact = None
+
+    live = main._session_to_state(main.active_sessions['s1'])
+    replayed = _replayed(main, client, 's1')
+    assert len(replayed['responses']) == len(live['responses']) == 1
+    assert replayed['interviewer']['conversation_history'] == live['interviewer']['conversation_history']
+    assert replayed['question_count'] == live['question_count'] == 2
@@ -0,0 +1,136 @@
+"""
+SessionStore caching, eviction and optimistic concurrency against a shared
+backend. Two stores on one MemorySessionBackend stand in for two workers.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.session_backends import MemorySessionBackend, SessionConflictError
+from services.session_store import SessionStore
+
+
+def _store(backend=None, removed=None, **kwargs) -> SessionStore:
+    return SessionStore(
+        backend=backend, serializer=dict, deserializer=dict,
+        on_remove=(lambda session_id, reason: removed.append((session_id, reason))) if removed is not None else None,
+        **kwargs
+    )
+
+
+def _append(item):
+    return lambda session: session['items'].append(item)
+
+
+def test_commit_reapplies_change_after_another_worker_saved():
+    async def scenario():
+        backend = MemorySessionBackend()
+        worker_a, worker_b = _store(backend), _store(backend)
+        await worker_a.put('s', {'items': []})
+
+        session_a = await worker_a.fetch('s')
+        session_b = await worker_b.fetch('s')
+        _append('b')(session_b)
+        await worker_b.commit('s', reapply=_append('b'), session=session_b)
+
+        # Worker A's cached copy is now one version behind
+        _append('a')(session_a)
+        saved = await worker_a.commit('s', reapply=_append('a'), session=session_a)
+        return saved, backend.load('s')
+
+    saved, (state, version) = asyncio.run(scenario())
+    assert saved['items'] == ['b', 'a']
+    assert state['items'] == ['b', 'a']
+    assert version == 3
+
+
+def test_commit_without_reapply_raises_on_conflict():
+    async def scenario():
+        backend = MemorySessionBackend()
+        worker_a, worker_b = _store(backend), _store(backend)
+        await worker_a.put('s', {'items': []})
+        await worker_b.fetch('s')
+        await worker_b.commit('s')
+        await worker_a.commit('s')
+
+    with pytest.raises(SessionConflictError):
+        asyncio.run(scenario())
+
+
+def test_fetch_reloads_newer_version_and_keeps_current_copy():
+    async def scenario():
+        backend = MemorySessionBackend()
+        worker_a, worker_b = _store(backend), _store(backend)
+        await worker_a.put('s', {'items': []})
+        first = await worker_a.fetch('s')
+        again = await worker_a.fetch('s')
+
+        session_b = await worker_b.fetch('s')
+        _append('b')(session_b)
+        await worker_b.commit('s')
+        reloaded = await worker_a.fetch('s')
+        return first, again, reloaded
+
+    first, again, reloaded = asyncio.run(scenario())
+    assert again is first
+    assert reloaded is not first
+    assert reloaded['items'] == ['b']
+
+
+def test_session_ended_by_another_worker_is_removed_with_callback():
+    async def scenario():
+        backend = MemorySessionBackend()
+        removed = []
+        worker_a, worker_b = _store(backend, removed), _store(backend)
+        await worker_a.put('s', {'items': []})
+        await worker_b.end('s')
+        return await worker_a.fetch('s'), 's' in worker_a, removed
+
+    session, cached, removed = asyncio.run(scenario())
+    assert session is None
+    assert not cached
+    assert removed == [('s', 'ended')]
+
+
+def test_least_recently_used_session_is_evicted():
+    async def scenario():
+        removed = []
+        store = _store(removed=removed, max_sessions=2)
+        await store.put('a', {})
+        await store.put('b', {})
+        await store.fetch('a')
+        await store.put('c', {})
+        return list(store), removed, (await store.stats())['sessions_evicted']
+
+    sessions, removed, evicted = asyncio.run(scenario())
+    assert sessions == ['a', 'c']
+    assert removed == [('b', 'evicted')]
+    assert evicted == 1
+
+
+def test_idle_sessions_expire_on_access_and_sweep():
+    async def scenario():
+        removed = []
+        store = _store(removed=removed, ttl_seconds=60)
+        await store.put('a', {})
+        await store.put('b', {})
+        # Age both sessions past the TTL
+        for entry in store._sessions.values():
+            entry[1] = time.monotonic() - 61
+        found = await store.fetch('a')
+        swept = await store.sweep()
+        return found, swept, len(store), removed
+
+    found, swept, remaining, removed = asyncio.run(scenario())
+    assert found is None
+    assert swept == 1
+    assert remaining == 0
+    assert removed == [('a', 'expired'), ('b', 'expired')]
@@ -0,0 +1,168 @@
+"""
+InterviewConnection routing: latest-frame-wins lanes, full-queue rejection,
+invalid messages and interview steps finishing after a disconnect.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.ws_pipeline import InterviewConnection
+
+
+class Disconnect(Exception):
+    pass
+
+
+class FakeWebSocket:
+    """Feeds queued client messages and records what the server sends"""
+
+    def __init__(self):
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.sent = []
+
+    def send(self, message):
+        self.incoming.put_nowait(message if isinstance(message, str) else json.dumps(message))
+
+    def disconnect(self):
+        self.incoming.put_nowait(None)
+
+    async def receive_text(self) -> str:
+        message = await self.incoming.get()
+        if message is None:
+            raise Disconnect()
+        return message
+
+    async def send_json(self, payload):
+        self.sent.append(payload)
+
+
+async def _run(connection: InterviewConnection):
+    try:
+        await connection.run()
+    except Disconnect:
+        pass
+
+
+async def _wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_only_newest_pending_frame_is_processed():
+    async def scenario():
+        websocket = FakeWebSocket()
+        connection = InterviewConnection(websocket)
+        release = asyncio.Event()
+        seen = []
+
+        async def screen_capture(message):
+            seen.append(message['frame'])
+            await release.wait()
+            return {'type': 'screen_analysis', 'frame': message['frame']}
+
+        connection.register('screen_capture', screen_capture, latest_only=True)
+        task = asyncio.create_task(_run(connection))
+        websocket.send({'type': 'screen_capture', 'frame': 1})
+        await _wait_for(lambda: seen == [1])
+        for frame in range(2, 5):
+            websocket.send({'type': 'screen_capture', 'frame': frame})
+        await _wait_for(lambda: websocket.incoming.empty())
+        await asyncio.sleep(0.01)
+        release.set()
+        await _wait_for(lambda: len(websocket.sent) == 2)
+        websocket.disconnect()
+        await task
+        return seen, websocket.sent, connection.stats()
+
+    seen, sent, stats = asyncio.run(scenario())
+    assert seen == [1, 4]
+    assert [payload['frame'] for payload in sent] == [1, 4]
+    assert stats['dropped']['screen_capture'] == 2
+
+
+def test_full_queue_rejects_with_429_and_keeps_reading():
+    async def scenario():
+        websocket = FakeWebSocket()
+        connection = InterviewConnection(websocket, queue_size=1)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def audio_chunk(message):
+            started.set()
+            await release.wait()
+            return {'type': 'transcription', 'chunk': message['chunk']}
+
+        connection.register('audio_chunk', audio_chunk)
+        task = asyncio.create_task(_run(connection))
+        websocket.send({'type': 'audio_chunk', 'chunk': 0})
+        await started.wait()
+        for chunk in range(1, 4):
+            websocket.send({'type': 'audio_chunk', 'chunk': chunk})
+        websocket.send({'type': 'ping'})
+        await _wait_for(lambda: {'type': 'pong'} in websocket.sent)
+        release.set()
+        await _wait_for(lambda: sum(payload['type'] == 'transcription' for payload in websocket.sent) == 2)
+        websocket.disconnect()
+        await task
+        return websocket.sent
+
+    sent = asyncio.run(scenario())
+    errors = [payload for payload in sent if payload['type'] == 'error']
+    # One chunk is being processed and one waits in the queue; the rest are rejected
+    assert len(errors) == 2
+    assert all(error['status_code'] == 429 and error['message_type'] == 'audio_chunk' for error in errors)
+    assert [payload['chunk'] for payload in sent if payload['type'] == 'transcription'] == [0, 1]
+
+
+def test_invalid_and_unknown_messages_get_error_events():
+    async def scenario():
+        websocket = FakeWebSocket()
+        connection = InterviewConnection(websocket)
+        task = asyncio.create_task(_run(connection))
+        for message in ('not json', {'no': 'type'}, {'type': []}, {'type': 'bogus'}, {'type': 'ping'}):
+            websocket.send(message)
+        await _wait_for(lambda: {'type': 'pong'} in websocket.sent)
+        websocket.disconnect()
+        await task
+        return websocket.sent
+
+    sent = asyncio.run(scenario())
+    assert sent[:3] == [{'type': 'error', 'error': 'Invalid message'}] * 3
+    assert sent[3]['status_code'] == 400 and sent[3]['message_type'] == 'bogus'
+    assert sent[4] == {'type': 'pong'}
+
+
+def test_interview_step_finishes_after_disconnect():
+    async def scenario():
+        websocket = FakeWebSocket()
+        connection = InterviewConnection(websocket)
+        started, finished = asyncio.Event(), []
+
+        async def respond(message):
+            started.set()
+            await asyncio.sleep(0.05)
+            finished.append('respond')
+            return {'type': 'question'}
+
+        async def audio_chunk(message):
+            await asyncio.sleep(10)
+            finished.append('audio_chunk')
+
+        connection.register('respond', respond, lane='interview', finish_on_disconnect=True)
+        connection.register('audio_chunk', audio_chunk)
+        task = asyncio.create_task(_run(connection))
+        websocket.send({'type': 'audio_chunk'})
+        websocket.send({'type': 'respond'})
+        await started.wait()
+        websocket.disconnect()
+        await asyncio.wait_for(task, 2)
+        return finished
+
+    assert asyncio.run(scenario()) == ['respond']
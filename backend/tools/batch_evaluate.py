@@ -0,0 +1,255 @@
+"""
+Batch evaluation of stored interview transcripts
+
+Re-grades a whole cohort offline by running Evaluator.evaluate_interview over
+every transcript with bounded concurrency. Results are streamed to a JSONL
+file as they complete; re-running with the same output file skips sessions
+that already have a successful result, so an interrupted run can be resumed.
+
+Each transcript is a JSON object:
+    {"session_id": "...", "conversation_history": [...], "project_context": {...}}
+
+Usage (from the backend directory):
+    python -m tools.batch_evaluate transcripts/ -o results.jsonl --concurrency 8
+    python -m tools.batch_evaluate cohort.jsonl -o results.jsonl --mode fanout \\
+        --weights technical_depth=0.4,clarity=0.2,originality=0.1,implementation_understanding=0.3
+    python -m tools.batch_evaluate cohort.jsonl -o results.jsonl --fake
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, Iterator, Set
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.evaluator import Evaluator
+from services.fake_llm import FakeOpenAI
+
+# USD per 1K tokens (GPT-4, 8K context)
+DEFAULT_PROMPT_PRICE = 0.03
+DEFAULT_COMPLETION_PRICE = 0.06
+
+
+def iter_transcripts(source: Path) -> Iterator[Dict]:
+    """Yield transcripts from a directory of .json files or a .jsonl file"""
+    if source.is_dir():
+        for path in sorted(source.glob('*.json')):
+            with open(path, encoding='utf-8') as f:
+                transcript = json.load(f)
+            transcript.setdefault('session_id', path.stem)
+            yield transcript
+    else:
+        with open(source, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                transcript = json.loads(line)
+                transcript.setdefault('session_id', f"line-{line_number}")
+                yield transcript
+
+
+def load_checkpoint(output: Path) -> Set[str]:
+    """Session ids that already have a successful result in the output file"""
+    completed = set()
+    if not output.exists():
+        return completed
+
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get('success'):
+                completed.add(record['session_id'])
+    return completed
+
+
+def truncate_partial_line(output: Path):
+    """Cut a partially written last line off the output so appended records start on a new line"""
+    if not output.exists():
+        return
+    with open(output, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Find the end of the last complete line
+        position = size
+        while position > 0:
+            chunk_start = max(0, position - 4096)
+            f.seek(chunk_start)
+            newline = f.read(position - chunk_start).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(chunk_start + newline + 1)
+                return
+            position = chunk_start
+        f.truncate(0)
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse 'name=weight,name=weight' into a dict"""
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def evaluate_transcript(evaluator: Evaluator, transcript: Dict) -> Dict:
+    """Evaluate one transcript and build its output record"""
+    started = time.perf_counter()
+    result = evaluator.evaluate_interview(
+        transcript.get('conversation_history', []),
+        transcript.get('project_context', {})
+    )
+
+    record = {
+        'session_id': transcript['session_id'],
+        'success': result['success'],
+        'evaluation': result['evaluation'],
+        'usage': result.get('usage', {}),
+        'elapsed': round(time.perf_counter() - started, 3)
+    }
+    if not result['success']:
+        record['error'] = result.get('error')
+    return record
+
+
+def run_batch(evaluator: Evaluator, source: Path, output: Path, concurrency: int,
+              resume: bool = True, limit: int = None) -> Dict:
+    """
+    Evaluate every transcript in source, appending records to output
+
+    Args:
+        evaluator: Evaluator used for every transcript
+        source: Directory of .json transcripts or a .jsonl file
+        output: JSONL file the results are streamed to
+        concurrency: Maximum number of evaluations in flight
+        resume: Skip sessions that already succeeded in output
+        limit: Stop after this many evaluations
+
+    Returns:
+        Run statistics (counts, elapsed time and token usage)
+    """
+    completed = set()
+    if resume:
+        completed = load_checkpoint(output)
+        truncate_partial_line(output)
+    stats = {
+        'evaluated': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'skipped': 0,
+        'calls': 0,
+        'prompt_tokens': 0,
+        'completion_tokens': 0
+    }
+
+    started = time.perf_counter()
+    with open(output, 'a' if resume else 'w', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+
+        def drain(block_until_below: int):
+            nonlocal pending
+            while len(pending) >= block_until_below:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+
+                    stats['evaluated'] += 1
+                    stats['succeeded' if record['success'] else 'failed'] += 1
+                    for key in ('calls', 'prompt_tokens', 'completion_tokens'):
+                        stats[key] += record['usage'].get(key, 0)
+
+                    print(f"[{stats['evaluated']}] {record['session_id']}: "
+                          f"{'ok' if record['success'] else 'failed'} "
+                          f"({record['elapsed']}s)", file=sys.stderr)
+
+        submitted = 0
+        for transcript in iter_transcripts(source):
+            if transcript['session_id'] in completed:
+                stats['skipped'] += 1
+                continue
+            if limit is not None and submitted >= limit:
+                break
+
+            # Keep at most `concurrency` transcripts loaded and in flight
+            drain(concurrency)
+            pending.add(executor.submit(evaluate_transcript, evaluator, transcript))
+            submitted += 1
+
+        drain(1)
+
+    stats['elapsed'] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def format_report(stats: Dict, prompt_price: float, completion_price: float) -> str:
+    """Human readable throughput and cost summary"""
+    elapsed = stats['elapsed'] or 1e-9
+    cost = (stats['prompt_tokens'] / 1000 * prompt_price
+            + stats['completion_tokens'] / 1000 * completion_price)
+    per_evaluation = cost / stats['evaluated'] if stats['evaluated'] else 0
+
+    return "\n".join([
+        f"Evaluated:    {stats['evaluated']} ({stats['succeeded']} succeeded, "
+        f"{stats['failed']} failed, {stats['skipped']} skipped from checkpoint)",
+        f"Elapsed:      {stats['elapsed']:.2f}s",
+        f"Throughput:   {stats['evaluated'] / elapsed * 60:.1f} evaluations/min, "
+        f"{stats['calls'] / elapsed:.2f} LLM calls/s",
+        f"Tokens:       {stats['prompt_tokens']} prompt, {stats['completion_tokens']} completion",
+        f"Cost:         ${cost:.4f} total, ${per_evaluation:.4f} per evaluation",
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch evaluate stored interview transcripts")
+    parser.add_argument('source', type=Path, help="Directory of .json transcripts or a .jsonl file")
+    parser.add_argument('-o', '--output', type=Path, required=True, help="JSONL results file")
+    parser.add_argument('--concurrency', type=int, default=4, help="Evaluations in flight")
+    parser.add_argument('--mode', choices=['single', 'fanout'], help="Evaluation mode (default: EVALUATION_MODE)")
+    parser.add_argument('--weights', type=parse_weights, help="Override criterion weights, e.g. clarity=0.3,...")
+    parser.add_argument('--limit', type=int, help="Evaluate at most this many transcripts")
+    parser.add_argument('--restart', action='store_true', help="Ignore and overwrite existing results")
+    parser.add_argument('--fake', action='store_true', help="Use the offline fake LLM backend")
+    parser.add_argument('--fake-latency', type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument('--prompt-price', type=float, default=DEFAULT_PROMPT_PRICE, help="USD per 1K prompt tokens")
+    parser.add_argument('--completion-price', type=float, default=DEFAULT_COMPLETION_PRICE, help="USD per 1K completion tokens")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+
+    client = FakeOpenAI(latency=args.fake_latency) if args.fake else None
+    evaluator = Evaluator(api_key=os.getenv('OPENAI_API_KEY'), mode=args.mode, client=client)
+    if args.weights:
+        for name, weight in args.weights.items():
+            if name not in evaluator.evaluation_criteria:
+                parser.error(f"Unknown criterion: {name}")
+            evaluator.evaluation_criteria[name]['weight'] = weight
+
+    stats = run_batch(
+        evaluator,
+        args.source,
+        args.output,
+        concurrency=args.concurrency,
+        resume=not args.restart,
+        limit=args.limit
+    )
+    print(format_report(stats, args.prompt_price, args.completion_price))
+
+
+if __name__ == "__main__":
+    main()
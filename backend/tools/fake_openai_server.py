@@ -0,0 +1,195 @@
+"""
+Local HTTP stand-in for the OpenAI chat and Whisper APIs
+
+Serves /v1/chat/completions, /v1/audio/transcriptions and /v1/models with the same
+deterministic payloads as services/fake_llm.py, after a delay drawn from a
+configurable latency distribution. Point the backend at it with
+OPENAI_BASE_URL so load tests exercise the real HTTP client path without
+network access or cost.
+
+Latency specs:
+    constant:SECONDS
+    uniform:LOW:HIGH
+    normal:MEAN:STDDEV
+    lognormal:MEDIAN:SIGMA
+
+Usage (from the backend directory):
+    python -m tools.fake_openai_server --port 9100 \\
+        --chat-latency lognormal:0.8:0.4 --whisper-latency uniform:0.3:0.9
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=fake python main.py
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.fake_llm import estimate_tokens, fake_completion_payload, fake_transcription_payload
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn a latency spec such as 'lognormal:0.8:0.4' into a sampler (seconds)"""
+    kind, _, params = spec.partition(':')
+    try:
+        values = [float(value) for value in params.split(':')] if params else []
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid latency spec: {spec}")
+
+    if kind == 'constant' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal' and len(values) == 2 and values[0] > 0:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise argparse.ArgumentTypeError(f"Invalid latency spec: {spec}")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the latency and failure settings"""
+
+    daemon_threads = True
+
+    def __init__(self, address, chat_latency: str = 'constant:0', whisper_latency: str = 'constant:0',
+                 failure_rate: float = 0.0, seed: int = None):
+        super().__init__(address, FakeOpenAIHandler)
+        self.chat_latency = parse_latency(chat_latency)
+        self.whisper_latency = parse_latency(whisper_latency)
+        self.failure_rate = failure_rate
+        self.requests = {'chat': 0, 'transcription': 0, 'failed': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def simulate(self, kind: str, sampler: Callable[[random.Random], float]) -> bool:
+        """Sleep for a sampled latency; returns False if the call should fail"""
+        with self._lock:
+            self.requests[kind] += 1
+            delay = sampler(self._random)
+            failed = self.failure_rate > 0 and self._random.random() < self.failure_rate
+            if failed:
+                self.requests['failed'] += 1
+        time.sleep(delay)
+        return not failed
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # models.list() is what the backend warmup uses to open connections
+        if self.path.split('?', 1)[0].endswith('/models'):
+            return self._send_json({
+                'object': 'list',
+                'data': [{'id': model, 'object': 'model', 'created': 0, 'owned_by': 'fake'}
+                         for model in ('gpt-4', 'whisper-1')]
+            })
+        self._send_json({'error': {'message': f"Unknown endpoint {self.path}", 'type': 'invalid_request_error'}}, 404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = self.path.split('?', 1)[0]
+
+        if path.endswith('/chat/completions'):
+            if not self.server.simulate('chat', self.server.chat_latency):
+                return self._send_error()
+            request = json.loads(body or b'{}')
+            prompt = "\n".join(message.get('content', '') for message in request.get('messages', []))
+            content = json.dumps(fake_completion_payload(prompt))
+            return self._send_json({
+                'id': f"chatcmpl-fake-{time.time_ns()}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'gpt-4'),
+                'choices': [{
+                    'index': 0,
+                    'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': content}
+                }],
+                'usage': {
+                    'prompt_tokens': estimate_tokens(prompt),
+                    'completion_tokens': estimate_tokens(content),
+                    'total_tokens': estimate_tokens(prompt) + estimate_tokens(content)
+                }
+            })
+
+        if path.endswith('/audio/transcriptions'):
+            if not self.server.simulate('transcription', self.server.whisper_latency):
+                return self._send_error()
+            # The multipart body stands in for the audio; only its size is used
+            return self._send_json({'task': 'transcribe', 'segments': [], **fake_transcription_payload(body)})
+
+        self._send_json({'error': {'message': f"Unknown endpoint {path}", 'type': 'invalid_request_error'}}, 404)
+
+    def _send_error(self):
+        self._send_json({'error': {'message': 'Simulated upstream failure', 'type': 'server_error'}}, 500)
+
+    def _send_json(self, payload, status: int = 200):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **settings) -> FakeOpenAIServer:
+    """Start a server on a background thread (port 0 picks a free port)"""
+    server = FakeOpenAIServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, name='fake-openai', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve fake OpenAI chat and Whisper endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--chat-latency', type=str, default='lognormal:0.8:0.4',
+                        help="Latency distribution of chat completions")
+    parser.add_argument('--whisper-latency', type=str, default='uniform:0.3:0.9',
+                        help="Latency distribution of transcriptions")
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    for spec in (args.chat_latency, args.whisper_latency):
+        try:
+            parse_latency(spec)
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
+
+    server = FakeOpenAIServer(
+        (args.host, args.port),
+        chat_latency=args.chat_latency,
+        whisper_latency=args.whisper_latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed
+    )
+    print(f"Fake OpenAI API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+"""
+Load test simulating concurrent interviews
+
+Drives N virtual students through the real interview flow: start, periodic
+screen captures, audio transcription, K rounds of answers and a final
+evaluation, over HTTP, the WebSocket, or a mix of both. The test steps
+through increasing concurrency levels and reports per-endpoint p50/p95/p99
+latency and error rates for each level, plus the saturation point: the first
+level where throughput stops growing, p95 latency exceeds the SLO, or the
+error rate exceeds its limit.
+
+With --spawn the fake OpenAI/Whisper server (tools/fake_openai_server.py)
+and a backend pointed at it are started locally, so no API key or network
+access is needed.
+
+Usage (from the backend directory):
+    python -m tools.loadtest --spawn --levels 5,10,20,40 --transport mixed \\
+        --chat-latency lognormal:0.8:0.4 --whisper-latency uniform:0.3:0.9
+    python -m tools.loadtest --url http://localhost:8000 --levels 10 --rounds 5
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.fake_openai_server import parse_latency, start_server
+
+CODE_LINES = [
+    "def evaluate(session, responses):",
+    "    scores = {}",
+    "    for criterion, weight in WEIGHTS.items():",
+    "        scores[criterion] = grade(responses, criterion) * weight",
+    "    return sum(scores.values())",
+    "",
+    "class SessionStore:",
+    "    def get(self, session_id):",
+    "        return self._sessions.get(session_id)",
+]
+
+# WebSocket client message -> server event carrying its result
+WS_RESULT_EVENTS = {
+    'start': 'question',
+    'respond': 'question',
+    'evaluate': 'evaluation',
+    'audio_chunk': 'transcription',
+    'screen_capture': 'screen_analysis'
+}
+
+
+def make_frames(count: int = 4, width: int = 1280, height: int = 720) -> List[str]:
+    """Synthetic screen captures (PNG, base64) showing slightly different code"""
+    frames = []
+    for index in range(count):
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+        for line_number, line in enumerate(CODE_LINES[:len(CODE_LINES) - index]):
+            draw.text((40, 40 + line_number * 28), line, fill='black')
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        frames.append(base64.b64encode(buffer.getvalue()).decode('ascii'))
+    return frames
+
+
+def make_audio(seconds: float = 2.0) -> str:
+    """Random bytes standing in for a recorded answer (base64)"""
+    return base64.b64encode(os.urandom(int(16000 * seconds))).decode('ascii')
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of values (q in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Recorder:
+    """Latencies and errors per endpoint for one load level"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self.response_bytes: Dict[str, int] = {}
+        self.completed_interviews = 0
+        self.failed_interviews = 0
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True, size: int = 0):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.errors.setdefault(endpoint, 0)
+        self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + size
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def drop(self, endpoint: str, count: int = 1):
+        self.dropped[endpoint] = self.dropped.get(endpoint, 0) + count
+
+    def summary(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'errors': self.errors[endpoint],
+                'error_rate': self.errors[endpoint] / len(values),
+                'dropped': self.dropped.get(endpoint, 0),
+                'avg_bytes': self.response_bytes.get(endpoint, 0) / len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99)
+            }
+        all_values = [value for values in self.latencies.values() for value in values]
+        requests = len(all_values)
+        errors = sum(self.errors.values())
+        return {
+            'elapsed': elapsed,
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'throughput': requests / elapsed if elapsed else 0.0,
+            'interviews_per_minute': self.completed_interviews / elapsed * 60 if elapsed else 0.0,
+            'completed_interviews': self.completed_interviews,
+            'failed_interviews': self.failed_interviews,
+            'p95': percentile(all_values, 95),
+            'endpoints': endpoints
+        }
+
+
+async def http_call(client: httpx.AsyncClient, recorder: Recorder, method: str,
+                    route: str, path: str, payload: Dict = None) -> Optional[Dict]:
+    """Send one request, recording its latency; returns the JSON body on success"""
+    endpoint = f"{method} {route}"
+    started = time.perf_counter()
+    size = 0
+    try:
+        response = await client.request(method, path, json=payload)
+        size = len(response.content)
+        body = response.json()
+        ok = response.status_code < 400 and body.get('success', True) is not False
+    except (httpx.HTTPError, ValueError):
+        body, ok = None, False
+    recorder.record(endpoint, time.perf_counter() - started, ok, size)
+    return body if ok else None
+
+
+async def http_student(client: httpx.AsyncClient, recorder: Recorder, number: int,
+                       args, frames: List[str], audio: str):
+    """One interview driven through the HTTP API"""
+    session_id = f"load-{uuid.uuid4().hex[:12]}"
+    rng = random.Random(number)
+
+    result = await http_call(client, recorder, 'POST', '/api/interview/start', '/api/interview/start', {
+        'session_id': session_id,
+        'student_name': f"Student {number}",
+        'project_name': "Load test project"
+    })
+    if result is None:
+        recorder.failed_interviews += 1
+        return
+
+    completed = True
+    base_frame = None
+    for round_number in range(args.rounds):
+        screen_text = None
+        for frame in range(args.frames):
+            capture = {
+                'session_id': session_id,
+                'image_base64': frames[(round_number + frame) % len(frames)],
+                'timestamp': time.time()
+            }
+            if args.screen_delta:
+                capture.update(delta=True, base_frame=base_frame)
+            analysis = await http_call(client, recorder, 'POST', '/api/screen/analyze', '/api/screen/analyze', capture)
+            if analysis:
+                base_frame = analysis.get('frame')
+                screen_text = analysis.get('ocr', {}).get('text') or screen_text
+            await asyncio.sleep(args.frame_interval * rng.uniform(0.5, 1.5))
+
+        transcription = await http_call(client, recorder, 'POST', '/api/audio/transcribe', '/api/audio/transcribe', {
+            'session_id': session_id,
+            'audio_base64': audio,
+            'format': 'webm'
+        })
+        answer = (transcription or {}).get('transcription', {}).get('text') or f"Answer {round_number}"
+
+        result = await http_call(client, recorder, 'POST', '/api/interview/respond', '/api/interview/respond', {
+            'session_id': session_id,
+            'response_text': answer,
+            'screen_context': screen_text
+        })
+        if result is None:
+            completed = False
+            break
+        if result.get('should_end'):
+            break
+        await asyncio.sleep(args.think_time * rng.uniform(0.5, 1.5))
+
+    if completed:
+        completed = await http_call(
+            client, recorder, 'POST', '/api/interview/evaluate/{session_id}',
+            f"/api/interview/evaluate/{session_id}"
+        ) is not None
+    await http_call(client, recorder, 'DELETE', '/api/interview/end/{session_id}', f"/api/interview/end/{session_id}")
+
+    if completed:
+        recorder.completed_interviews += 1
+    else:
+        recorder.failed_interviews += 1
+
+
+class WebSocketStudent:
+    """One interview driven over /ws/interview/{session_id}"""
+
+    def __init__(self, recorder: Recorder, number: int, args, frames: List[str], audio: str):
+        self.recorder = recorder
+        self.number = number
+        self.args = args
+        self.frames = frames
+        self.audio = audio
+        self.random = random.Random(number)
+        self.session_id = f"load-{uuid.uuid4().hex[:12]}"
+        self._base_frame: Optional[int] = None
+        # Send times of in-flight messages; the interview lane and audio are
+        # answered in order, screen frames are matched on their timestamp
+        self._in_flight: Dict[str, deque] = {message_type: deque() for message_type in WS_RESULT_EVENTS}
+        self._frames_in_flight: Dict[float, float] = {}
+        self._events: Dict[str, asyncio.Queue] = {'question': asyncio.Queue(), 'evaluation': asyncio.Queue(),
+                                                  'transcription': asyncio.Queue()}
+
+    async def run(self, url: str):
+        ws_url = url.replace('http', 'ws', 1) + f"/ws/interview/{self.session_id}"
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(ws_url, max_size=None) as websocket:
+                self.recorder.record('ws connect', time.perf_counter() - started)
+                reader = asyncio.create_task(self._read(websocket))
+                try:
+                    completed = await self._interview(websocket)
+                finally:
+                    reader.cancel()
+                    await asyncio.gather(reader, return_exceptions=True)
+        except (OSError, websockets.WebSocketException, asyncio.TimeoutError):
+            self.recorder.record('ws connect', time.perf_counter() - started, ok=False)
+            completed = False
+
+        # Frames still unanswered were superseded by newer ones (latest-frame-wins)
+        self.recorder.drop('ws screen_capture', len(self._frames_in_flight))
+        if completed:
+            self.recorder.completed_interviews += 1
+        else:
+            self.recorder.failed_interviews += 1
+
+    async def _interview(self, websocket) -> bool:
+        await self._send(websocket, {
+            'type': 'start',
+            'student_name': f"Student {self.number}",
+            'project_name': "Load test project"
+        })
+        if not await self._expect('question'):
+            return False
+
+        for round_number in range(self.args.rounds):
+            for frame in range(self.args.frames):
+                capture = {
+                    'type': 'screen_capture',
+                    'data': self.frames[(round_number + frame) % len(self.frames)],
+                    'timestamp': time.time()
+                }
+                if self.args.screen_delta:
+                    capture.update(delta=True, base_frame=self._base_frame)
+                await self._send(websocket, capture)
+                await asyncio.sleep(self.args.frame_interval * self.random.uniform(0.5, 1.5))
+
+            await self._send(websocket, {'type': 'audio_chunk', 'data': self.audio, 'format': 'webm'})
+            transcription = await self._expect('transcription')
+            answer = (transcription or {}).get('result', {}).get('text') or f"Answer {round_number}"
+
+            await self._send(websocket, {'type': 'respond', 'response_text': answer})
+            result = await self._expect('question')
+            if result is None:
+                return False
+            if result.get('should_end'):
+                break
+            await asyncio.sleep(self.args.think_time * self.random.uniform(0.5, 1.5))
+
+        await self._send(websocket, {'type': 'evaluate'})
+        return await self._expect('evaluation') is not None
+
+    async def _send(self, websocket, message: Dict):
+        now = time.perf_counter()
+        if message['type'] == 'screen_capture':
+            self._frames_in_flight[message['timestamp']] = now
+        else:
+            self._in_flight[message['type']].append(now)
+        await websocket.send(json.dumps(message))
+
+    async def _expect(self, event: str) -> Optional[Dict]:
+        """Wait for the next result event of a type (None on error or timeout)"""
+        try:
+            return await asyncio.wait_for(self._events[event].get(), self.args.timeout)
+        except asyncio.TimeoutError:
+            self.recorder.record(f"ws {event} timeout", self.args.timeout, ok=False)
+            return None
+
+    async def _read(self, websocket):
+        async for data in websocket:
+            message = json.loads(data)
+            event = message.get('type')
+            now = time.perf_counter()
+
+            if event == 'screen_analysis':
+                self._base_frame = message.get('frame')
+                sent = self._frames_in_flight.pop(message.get('timestamp'), None)
+                if sent is not None:
+                    self.recorder.record('ws screen_capture', now - sent, size=len(data))
+                # Older frames were dropped in favour of this one
+                for timestamp in [t for t in self._frames_in_flight if t < (message.get('timestamp') or 0)]:
+                    del self._frames_in_flight[timestamp]
+                    self.recorder.drop('ws screen_capture')
+                continue
+
+            if event == 'error':
+                message_type = message.get('message_type')
+                if message_type == 'screen_capture':
+                    # Which frame failed is unknown; count the oldest one
+                    if self._frames_in_flight:
+                        oldest = min(self._frames_in_flight)
+                        self.recorder.record('ws screen_capture', now - self._frames_in_flight.pop(oldest), ok=False)
+                elif message_type in self._in_flight and self._in_flight[message_type]:
+                    self.recorder.record(f"ws {message_type}", now - self._in_flight[message_type].popleft(), ok=False)
+                    await self._events[WS_RESULT_EVENTS[message_type]].put(None)
+                continue
+
+            # 'question' answers start and respond, which share one ordered lane
+            message_type = {'question': 'respond' if not self._in_flight['start'] else 'start',
+                            'evaluation': 'evaluate', 'transcription': 'audio_chunk'}.get(event)
+            if message_type and self._in_flight[message_type]:
+                self.recorder.record(f"ws {message_type}", now - self._in_flight[message_type].popleft(), size=len(data))
+                await self._events[event].put(message)
+
+
+async def run_level(url: str, students: int, args, frames: List[str], audio: str) -> Dict:
+    """Run one load level: `students` concurrent interviews, started over the ramp-up period"""
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=students + 10, max_keepalive_connections=students + 10)
+
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        async def student(number: int):
+            await asyncio.sleep(args.ramp_up * number / max(students, 1))
+            use_ws = args.transport == 'ws' or (args.transport == 'mixed' and number % 2)
+            if use_ws:
+                await WebSocketStudent(recorder, number, args, frames, audio).run(url)
+            else:
+                await http_student(client, recorder, number, args, frames, audio)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(student(number) for number in range(students)))
+        elapsed = time.perf_counter() - started
+
+    summary = recorder.summary(elapsed)
+    summary['students'] = students
+    return summary
+
+
+def find_saturation(levels: List[Dict], slo_p95: float, max_error_rate: float, min_gain: float) -> Optional[Dict]:
+    """First level where throughput stops growing or latency/error limits are exceeded"""
+    previous = None
+    for level in levels:
+        reasons = []
+        if level['error_rate'] > max_error_rate:
+            reasons.append(f"error rate {level['error_rate']:.1%} > {max_error_rate:.1%}")
+        if level['p95'] > slo_p95:
+            reasons.append(f"p95 {level['p95']:.2f}s > SLO {slo_p95:.2f}s")
+        if previous and level['throughput'] < previous['throughput'] * (1 + min_gain):
+            reasons.append(f"throughput {level['throughput']:.1f} req/s did not grow "
+                           f"{min_gain:.0%} over {previous['throughput']:.1f} req/s")
+        if reasons:
+            return {'students': level['students'],
+                    'sustained': previous['students'] if previous else 0,
+                    'reasons': reasons}
+        previous = level
+    return None
+
+
+def format_report(levels: List[Dict], saturation: Optional[Dict]) -> str:
+    lines = []
+    for level in levels:
+        lines.append(
+            f"\n== {level['students']} students: {level['completed_interviews']} interviews completed, "
+            f"{level['failed_interviews']} failed in {level['elapsed']:.1f}s "
+            f"({level['throughput']:.1f} req/s, {level['interviews_per_minute']:.1f} interviews/min)"
+        )
+        lines.append(f"{'endpoint':<42}{'requests':>9}{'errors':>8}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}"
+                     f"{'dropped':>9}{'avg KB':>9}")
+        for endpoint, stats in level['endpoints'].items():
+            lines.append(
+                f"{endpoint:<42}{stats['requests']:>9}{stats['errors']:>8}{stats['error_rate'] * 100:>6.1f}%"
+                f"{stats['p50'] * 1000:>7.0f}ms{stats['p95'] * 1000:>7.0f}ms{stats['p99'] * 1000:>7.0f}ms"
+                f"{stats['dropped']:>9}{stats['avg_bytes'] / 1024:>9.1f}"
+            )
+
+    lines.append("")
+    if saturation:
+        lines.append(f"Saturation at {saturation['students']} concurrent students "
+                     f"(sustained {saturation['sustained']}): {'; '.join(saturation['reasons'])}")
+    else:
+        lines.append(f"No saturation up to {levels[-1]['students']} concurrent students")
+    return "\n".join(lines)
+
+
+def spawn_backend(port: int, fake_base_url: str, workers: int, extra_env: Dict[str, str] = None) -> subprocess.Popen:
+    """Start the backend with its OpenAI client pointed at the fake server"""
+    env = {
+        **os.environ,
+        'OPENAI_API_KEY': 'fake',
+        'OPENAI_BASE_URL': fake_base_url,
+        'PYTHONUNBUFFERED': '1',
+        **(extra_env or {})
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        cwd=str(Path(__file__).resolve().parent.parent),
+        env=env
+    )
+
+
+async def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=2.0) as client:
+        while True:
+            try:
+                if (await client.get('/')).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Backend at {url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+async def run(args) -> List[Dict]:
+    frames = make_frames()
+    audio = make_audio(args.audio_seconds)
+    await wait_until_up(args.url)
+
+    results = []
+    for students in args.levels:
+        print(f"Running {students} concurrent students over {args.transport}...", file=sys.stderr)
+        results.append(await run_level(args.url, students, args, frames, audio))
+        if args.cooldown:
+            await asyncio.sleep(args.cooldown)
+    return results
+
+
+def parse_levels(value: str) -> List[int]:
+    try:
+        levels = [int(level) for level in value.split(',') if level.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid levels: {value}")
+    if not levels or min(levels) < 1:
+        raise argparse.ArgumentTypeError(f"Invalid levels: {value}")
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the interview backend with virtual students")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="Backend base URL")
+    parser.add_argument('--levels', type=parse_levels, default=[1, 5, 10, 20],
+                        help="Comma-separated concurrent student counts to step through")
+    parser.add_argument('--transport', choices=['http', 'ws', 'mixed'], default='http',
+                        help="Drive interviews over HTTP, the WebSocket, or alternate between them")
+    parser.add_argument('--rounds', type=int, default=3, help="Answers per interview")
+    parser.add_argument('--frames', type=int, default=3, help="Screen captures per round")
+    parser.add_argument('--screen-delta', action='store_true',
+                        help="Request screen analysis as deltas against the previous frame")
+    parser.add_argument('--frame-interval', type=float, default=1.0, help="Mean seconds between screen captures")
+    parser.add_argument('--think-time', type=float, default=2.0, help="Mean seconds between answers")
+    parser.add_argument('--audio-seconds', type=float, default=2.0, help="Length of the simulated audio clip")
+    parser.add_argument('--ramp-up', type=float, default=5.0, help="Seconds over which each level's students start")
+    parser.add_argument('--cooldown', type=float, default=2.0, help="Seconds to pause between levels")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument('--slo-p95', type=float, default=5.0, help="p95 latency (seconds) above which a level is saturated")
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help="Error rate above which a level is saturated")
+    parser.add_argument('--min-gain', type=float, default=0.1,
+                        help="Minimum relative throughput gain over the previous level")
+    parser.add_argument('--json', type=Path, help="Also write the full results to this file")
+    parser.add_argument('--spawn', action='store_true',
+                        help="Start the fake OpenAI server and a backend pointed at it")
+    parser.add_argument('--port', type=int, default=8765, help="Backend port when spawning")
+    parser.add_argument('--workers', type=int, default=1, help="Backend worker processes when spawning")
+    parser.add_argument('--chat-latency', default='lognormal:0.8:0.4', help="Fake chat completion latency distribution")
+    parser.add_argument('--whisper-latency', default='uniform:0.3:0.9', help="Fake Whisper latency distribution")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of fake upstream calls that fail")
+    args = parser.parse_args(argv)
+
+    backend = fake_server = None
+    if args.spawn:
+        for spec in (args.chat_latency, args.whisper_latency):
+            try:
+                parse_latency(spec)
+            except argparse.ArgumentTypeError as e:
+                parser.error(str(e))
+        fake_server = start_server(
+            chat_latency=args.chat_latency,
+            whisper_latency=args.whisper_latency,
+            failure_rate=args.failure_rate
+        )
+        backend = spawn_backend(args.port, fake_server.base_url, args.workers)
+        args.url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait(timeout=10)
+        if fake_server is not None:
+            fake_server.shutdown()
+
+    saturation = find_saturation(results, args.slo_p95, args.max_error_rate, args.min_gain)
+    print(format_report(results, saturation))
+    if fake_server is not None:
+        print(f"Fake upstream calls: {fake_server.requests}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'levels': results, 'saturation': saturation}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
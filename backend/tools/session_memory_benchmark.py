@@ -0,0 +1,122 @@
+"""
+Memory benchmark for interview sessions
+
+Builds N realistic sessions (conversation, responses, repeated screen
+captures and transcripts) with the legacy dict-of-dicts layout and with the
+slotted session models (including the context search index), and reports
+bytes per session for each as measured by tracemalloc.
+
+Usage (from the backend directory):
+    python -m tools.session_memory_benchmark --sessions 1000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.ai_interviewer import AIInterviewer
+from services.fake_llm import FakeOpenAI
+from services.session_models import (
+    ConversationEntry, EntryType, InterviewSession, ResponseRecord
+)
+
+SLIDE_TEXT = "\n".join(
+    f"def handler_{i}(request):\n    return process(request.data, retries={i})" for i in range(40)
+)
+
+
+def _screen_texts(session_number: int, captures: int) -> List[str]:
+    # Most captures repeat the same screen; every fifth one shows something new.
+    # Texts are rebuilt per capture, as OCR output is, so duplicates are
+    # equal but distinct string objects.
+    return [
+        "".join([SLIDE_TEXT, f"\n# slide {session_number}-{i // 5}"])
+        for i in range(captures)
+    ]
+
+
+def build_legacy_session(session_number: int, exchanges: int, captures: int, client) -> dict:
+    """Session in the original dict-of-dicts layout"""
+    conversation_history = []
+    responses = []
+    for i in range(exchanges):
+        conversation_history.append({'type': 'question', 'content': f"Question {i} for session {session_number}?"})
+        conversation_history.append({'type': 'student_response', 'content': f"Answer {i} " * 30})
+        responses.append({'response': f"Answer {i} " * 30, 'screen_context': None, 'question_number': i})
+
+    interviewer = AIInterviewer(client=client)
+    interviewer.conversation_history = conversation_history
+    interviewer.project_context = {
+        'screen_content': _screen_texts(session_number, captures),
+        'speech_transcripts': [f"Transcript {i} " * 20 for i in range(exchanges)],
+        'identified_topics': []
+    }
+    return {
+        'student_name': f"Student {session_number}",
+        'project_name': "Project",
+        'interviewer': interviewer,
+        'started_at': None,
+        'question_count': exchanges,
+        'responses': responses,
+        'evaluation': None
+    }
+
+
+def build_compact_session(session_number: int, exchanges: int, captures: int, client) -> InterviewSession:
+    """Session using the slotted session models"""
+    interviewer = AIInterviewer(client=client)
+    session = InterviewSession(interviewer, student_name=f"Student {session_number}", project_name="Project")
+    for i in range(exchanges):
+        interviewer.conversation_history.append(
+            ConversationEntry(EntryType.QUESTION, f"Question {i} for session {session_number}?")
+        )
+        interviewer.conversation_history.append(
+            ConversationEntry(EntryType.STUDENT_RESPONSE, f"Answer {i} " * 30)
+        )
+        session.responses.append(ResponseRecord(f"Answer {i} " * 30, None, i))
+    for text in _screen_texts(session_number, captures):
+        interviewer.update_context(screen_text=text)
+    for i in range(exchanges):
+        interviewer.update_context(speech_text=f"Transcript {i} " * 20)
+    # Follow-up questions search the context, which builds its index; a
+    # live session carries that index too
+    interviewer.project_context.relevant_fragments(f"Answer {exchanges - 1} process request")
+    session.question_count = exchanges
+    return session
+
+
+def measure(builder: Callable, sessions: int, exchanges: int, captures: int) -> int:
+    """Bytes allocated per session by builder"""
+    client = FakeOpenAI()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = [builder(i, exchanges, captures, client) for i in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return (after - before) // sessions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory used per interview session")
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--exchanges', type=int, default=10, help="Question/answer pairs per session")
+    parser.add_argument('--captures', type=int, default=30, help="Screen captures per session")
+    args = parser.parse_args(argv)
+
+    legacy = measure(build_legacy_session, args.sessions, args.exchanges, args.captures)
+    compact = measure(build_compact_session, args.sessions, args.exchanges, args.captures)
+
+    print(f"{args.sessions} sessions, {args.exchanges} exchanges, {args.captures} screen captures each")
+    print(f"Legacy dict layout:    {legacy:>10,} bytes/session")
+    print(f"Slotted models:        {compact:>10,} bytes/session")
+    print(f"Saved:                 {legacy - compact:>10,} bytes/session ({(1 - compact / legacy) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
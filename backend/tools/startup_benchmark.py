@@ -0,0 +1,124 @@
+"""
+Startup benchmark: time-to-ready and first-request latency
+
+Launches the backend repeatedly against the local fake OpenAI server and
+measures, from the moment the process is spawned, how long it takes to
+answer the liveness probe and the readiness probe, then the latency of the
+first screen analysis (OCR) and the first interview start (LLM call). With
+--compare every run is repeated with the startup warmup disabled, to show
+the one-time costs it moves out of the first requests.
+
+Usage (from the backend directory):
+    python -m tools.startup_benchmark --runs 5 --compare
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.fake_openai_server import start_server
+from tools.loadtest import make_frames, spawn_backend
+
+
+def wait_for(client: httpx.Client, path: str, timeout: float) -> Dict:
+    """Poll path until it returns 200; returns its body"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = client.get(path)
+            if response.status_code == 200:
+                return response.json()
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{path} did not return 200 within {timeout:.0f}s")
+        time.sleep(0.02)
+
+
+def timed_request(client: httpx.Client, method: str, path: str, payload: Dict) -> float:
+    started = time.perf_counter()
+    client.request(method, path, json=payload).raise_for_status()
+    return time.perf_counter() - started
+
+
+def measure_startup(port: int, fake_base_url: str, warmup: bool, frame: str, timeout: float) -> Dict:
+    """Spawn one backend and time it until ready and through its first requests"""
+    started = time.perf_counter()
+    backend = spawn_backend(port, fake_base_url, workers=1, extra_env={'WARMUP': 'true' if warmup else 'false'})
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            wait_for(client, '/health/live', timeout)
+            live = time.perf_counter() - started
+            status = wait_for(client, '/health/ready', timeout)
+            ready = time.perf_counter() - started
+
+            first_ocr = timed_request(client, 'POST', '/api/screen/analyze', {
+                'session_id': 'startup-benchmark', 'image_base64': frame, 'timestamp': time.time()
+            })
+            first_llm = timed_request(client, 'POST', '/api/interview/start', {
+                'session_id': 'startup-benchmark', 'student_name': 'Benchmark', 'project_name': 'Startup'
+            })
+    finally:
+        backend.terminate()
+        backend.wait(timeout=10)
+
+    return {
+        'live': live,
+        'ready': ready,
+        'reported_time_to_ready': status.get('time_to_ready_seconds'),
+        'warmup': status.get('warmup_seconds'),
+        'status': status.get('status'),
+        'first_ocr': first_ocr,
+        'first_llm': first_llm
+    }
+
+
+def format_report(results: Dict[str, List[Dict]]) -> str:
+    columns = ['live', 'ready', 'first_ocr', 'first_llm']
+    lines = [f"{'mode':<12}{'runs':>6}" + "".join(f"{column:>12}" for column in columns) + "   status"]
+    for mode, runs in results.items():
+        medians = [statistics.median(run[column] for run in runs) for column in columns]
+        statuses = sorted({run['status'] for run in runs})
+        lines.append(
+            f"{mode:<12}{len(runs):>6}" + "".join(f"{value * 1000:>10.0f}ms" for value in medians)
+            + f"   {', '.join(statuses)}"
+        )
+    lines.append("Medians; live/ready are measured from process spawn.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure backend time-to-ready and first request latency")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--compare', action='store_true', help="Also run with the startup warmup disabled")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--chat-latency', default='constant:0.2', help="Fake chat completion latency distribution")
+    args = parser.parse_args(argv)
+
+    fake_server = start_server(chat_latency=args.chat_latency)
+    frame = make_frames(count=1)[0]
+    modes = {'warmup': True, 'no-warmup': False} if args.compare else {'warmup': True}
+
+    results: Dict[str, List[Dict]] = {mode: [] for mode in modes}
+    try:
+        for run in range(args.runs):
+            for mode, warmup in modes.items():
+                result = measure_startup(args.port, fake_server.base_url, warmup, frame, args.timeout)
+                results[mode].append(result)
+                print(f"run {run + 1} {mode}: ready in {result['ready']:.2f}s "
+                      f"(server-reported {result['reported_time_to_ready']}s)", file=sys.stderr)
+    finally:
+        fake_server.shutdown()
+
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()